@@ -0,0 +1 @@
+# bench/ : banc de charge hors ligne (faux Discord en mémoire), lancé avec python -m bench.charge
@@ -0,0 +1,357 @@
+# bench/charge.py
+
+"""Banc de charge hors ligne des cogs, contre un faux Discord en mémoire.
+
+    python -m bench.charge --combats 2000 --concurrence 500 --latence 0.03
+
+Chaque combat suit le parcours réel : /add_screen, type et bonus, ajout de
+joueurs, screens via /ajouter_screen, envoi en validation puis validation (ou refus par modal)
+par un membre du ladder. En parallèle, un gestionnaire impose des totaux avec
+/modifier_joueur (et consulte /historique) aux joueurs en cours de validation.
+Le bot, ses cogs et son instrumentation sont ceux de `main.py` ; seuls le
+réseau et la gateway sont simulés.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from bench.faux_discord import (
+    APP_ID, BOT_ID, GUILD_ID, FauxDiscord, guild_payload, membre_payload, user_payload,
+)
+
+DELAI_MAX = 60.0  # secondes avant de considérer une interaction comme perdue
+PREMIER_JOUEUR = 300000000000000000
+PREMIER_CANAL = 400000000000000000
+
+
+def parser():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("--combats", type=int, default=1000, help="nombre de combats joués")
+    p.add_argument("--concurrence", type=int, default=250, help="combats joués en même temps")
+    p.add_argument("--canaux", type=int, default=20, help="canaux sur lesquels se répartissent les combats")
+    p.add_argument("--latence", type=float, default=0.03, help="latence moyenne d'un appel REST (s)")
+    p.add_argument("--limite", type=int, default=5, help="requêtes par bucket et par fenêtre avant un 429")
+    p.add_argument("--fenetre", type=float, default=5.0, help="fenêtre des buckets de rate-limit (s)")
+    p.add_argument("--taux-429", type=float, default=0.0, help="probabilité de 429 aléatoire par appel")
+    p.add_argument("--pause", type=float, default=0.05, help="temps de réflexion entre deux clics (s)")
+    p.add_argument("--refus", type=float, default=0.1, help="part des combats refusés via le modal")
+    p.add_argument("--par-lot", action="store_true", help="valider via /file_validation plutôt qu'un par un")
+    p.add_argument("--modifications", type=int, default=50, help="/modifier_joueur du gestionnaire pendant les combats")
+    p.add_argument("--pause-gestion", type=float, default=0.3, help="temps entre deux commandes du gestionnaire (s)")
+    return p
+
+
+class Banc:
+    def __init__(self, bot, faux, pause, par_lot=False):
+        self.bot = bot
+        self.faux = faux
+        self.pause = pause
+        self.par_lot = par_lot
+        self.acks = []
+        self.acks_gestion = []
+        self.modifications = 0
+        self.interactions = 0
+        self.validations = 0
+        self.refus = 0
+        self.echecs = []
+
+    # ---------------------------
+    # Gateway simulée
+    # ---------------------------
+    async def envoyer(self, type_, canal, membre, data, message=None):
+        """Émet une interaction et attend son acquittement ; retourne (suivi, message de réponse)"""
+        interaction_id, payload = self.faux.interaction(type_, canal, membre, data, message)
+        self.interactions += 1
+        self.bot._connection.parse_interaction_create(payload)
+        suivi = self.faux.interactions[interaction_id]
+        reponse = await asyncio.wait_for(asyncio.shield(suivi.repondu), DELAI_MAX)
+        self.acks.append(suivi.ack)
+        await asyncio.sleep(self.pause)
+        return suivi, reponse
+
+    async def commande(self, nom, canal, membre, **options):
+        data = {
+            "id": str(self.faux.nouvel_id()),
+            "name": nom,
+            "type": 1,
+            "options": [{"name": k, "type": 3, "value": v} for k, v in options.items()],
+        }
+        return await self.envoyer(2, canal, membre, data)
+
+    async def commande_joueur(self, nom, canal, membre, joueur, **entiers):
+        """Commande dont l'option `joueur` est un membre, résolu comme l'envoie Discord"""
+        data = {
+            "id": str(self.faux.nouvel_id()),
+            "name": nom,
+            "type": 1,
+            "options": [
+                {"name": "joueur", "type": 6, "value": str(joueur)},
+                *({"name": k, "type": 4, "value": v} for k, v in entiers.items()),
+            ],
+            "resolved": {
+                "users": {str(joueur): user_payload(joueur)},
+                "members": {str(joueur): {k: v for k, v in membre_payload(joueur).items() if k != "user"}},
+            },
+        }
+        return await self.envoyer(2, canal, membre, data)
+
+    async def clic(self, message_id, custom_id, membre):
+        message = self.faux.messages[message_id]
+        data = {"custom_id": custom_id, "component_type": 2}
+        return await self.envoyer(3, int(message["channel_id"]), membre, data, message)
+
+    async def selection(self, message_id, membre, valeurs):
+        message = self.faux.messages[message_id]
+        if not message["components"]:
+            raise RuntimeError(f"pas de sélection dans la réponse : {message['content']}")
+        select = message["components"][0]["components"][0]
+        data = {"custom_id": select["custom_id"], "component_type": select["type"], "values": [str(v) for v in valeurs]}
+        if select["type"] == 5:  # sélection d'utilisateurs
+            data["resolved"] = {
+                "users": {str(u): user_payload(u) for u in valeurs},
+                "members": {str(u): {k: v for k, v in membre_payload(u).items() if k != "user"} for u in valeurs},
+            }
+        return await self.envoyer(3, int(message["channel_id"]), membre, data, message)
+
+    async def bouton(self, message_id, libelle, membre):
+        """Clic sur un bouton non persistant, retrouvé par son libellé"""
+        message = self.faux.messages[message_id]
+        for rangee in message["components"]:
+            for composant in rangee["components"]:
+                if composant["type"] == 2 and libelle in composant.get("label", ""):
+                    return await self.clic(message_id, composant["custom_id"], membre)
+        raise RuntimeError(f"bouton introuvable : {libelle}")
+
+    async def soumettre(self, modal, canal, membre, valeur):
+        def remplir(composant):
+            if composant.get("type") == 4:
+                return {"type": 4, "custom_id": composant["custom_id"], "value": valeur}
+            rempli = {"type": composant["type"]}
+            if "component" in composant:
+                rempli["component"] = remplir(composant["component"])
+            if "components" in composant:
+                rempli["components"] = [remplir(c) for c in composant["components"]]
+            return rempli
+
+        data = {"custom_id": modal["custom_id"], "components": [remplir(c) for c in modal["components"]]}
+        return await self.envoyer(5, canal, membre, data)
+
+    async def screen(self, canal, membre, user_id):
+        """/ajouter_screen avec une pièce jointe résolue, comme l'envoie Discord"""
+        piece_id = str(self.faux.nouvel_id())
+        data = {
+            "id": str(self.faux.nouvel_id()),
+            "name": "ajouter_screen",
+            "type": 1,
+            "options": [{"name": "screen", "type": 11, "value": piece_id}],
+            "resolved": {"attachments": {piece_id: {
+                "id": piece_id,
+                "filename": "screen.png",
+                "size": 1024,
+                "content_type": "image/png",
+                "url": f"https://cdn.example/{user_id}.png",
+                "proxy_url": f"https://media.example/{user_id}.png",
+            }}},
+        }
+        return await self.envoyer(2, canal, membre, data)
+
+    # ---------------------------
+    # Scénarios
+    # ---------------------------
+    async def combat(self, i, canal, validateur, refuser):
+        joueur = PREMIER_JOUEUR + i * 3
+        membre = membre_payload(joueur)
+        _, message = await self.commande("add_screen", canal, membre)
+        combat_id = int(message["id"])
+
+        await self.clic(combat_id, "combat:attaque", membre)
+        await self.clic(combat_id, "combat:aucun_mort", membre)
+        _, ephemere = await self.clic(combat_id, "combat:ajouter_joueurs", membre)
+        await self.selection(int(ephemere["id"]), membre, [joueur + 1, joueur + 2])
+        await self.screen(canal, membre, joueur)
+
+        mention = f"<@{joueur}>"
+        attente = self.faux.attendre_message(
+            lambda m: '"validation:valider"' in json.dumps(m["components"]) and mention in json.dumps(m["embeds"])
+        )
+        await self.clic(combat_id, "combat:valider", membre)
+        validation = await asyncio.wait_for(attente, DELAI_MAX)
+
+        if self.par_lot:
+            return
+        if refuser:
+            suivi, _ = await self.clic(int(validation["id"]), "validation:refuser", validateur)
+            await self.soumettre(suivi.modal, canal, validateur, "Screens illisibles")
+            self.refus += 1
+        else:
+            await self.clic(int(validation["id"]), "validation:valider", validateur)
+            self.validations += 1
+            await self.commande("mon_rang", canal, membre)
+
+    async def valider_par_lot(self, canal, validateur):
+        """Un modérateur vide la file : toute la page sélectionnée puis validée, jusqu'à la fin"""
+        attente = self.faux.attendre_message(lambda m: "File de validation" in json.dumps(m["embeds"]))
+        await self.commande("file_validation", canal, validateur)
+        file_id = int((await asyncio.wait_for(attente, DELAI_MAX))["id"])
+        while True:
+            select = self.faux.messages[file_id]["components"][0]["components"][0]
+            if select.get("disabled"):
+                return
+            await self.selection(file_id, validateur, [option["value"] for option in select["options"]])
+            await self.bouton(file_id, "Valider la sélection", validateur)
+            self.validations += len(select["options"])
+
+    async def gerer(self, nombre, canal, gestionnaire, joueurs, pause):
+        """Un gestionnaire impose des totaux aux joueurs que le ladder valide au même moment ;
+        une commande sur dix consulte l'historique du joueur"""
+        for k in range(nombre):
+            joueur = joueurs[k % len(joueurs)]
+            try:
+                if k % 10 == 9:
+                    suivi, _ = await self.commande_joueur("historique", canal, gestionnaire, joueur)
+                else:
+                    suivi, _ = await self.commande_joueur("modifier_joueur", canal, gestionnaire, joueur, nouveau_total=k)
+                    self.modifications += 1
+                self.acks_gestion.append(suivi.ack)
+            except Exception as e:
+                self.echecs.append(f"gestion {k} : {type(e).__name__} {e}")
+            await asyncio.sleep(pause)
+
+    async def jouer(self, i, canal, validateur, refuser, semaphore):
+        async with semaphore:
+            try:
+                await self.combat(i, canal, validateur, refuser)
+            except Exception as e:
+                self.echecs.append(f"combat {i} : {type(e).__name__} {e}")
+
+
+def centile(valeurs, p):
+    if len(valeurs) < 2:
+        return valeurs[0] if valeurs else float("nan")
+    return statistics.quantiles(valeurs, n=100)[p - 1]
+
+
+async def principal(args):
+    # Les exceptions des handlers s'affichent ; les 429 simulés sont seulement comptés
+    logging.basicConfig(level=logging.ERROR)
+    dossier = tempfile.mkdtemp(prefix="bst-bench-")
+    # Avant l'import de main : base jetable et port HTTP libre
+    os.environ["BST_DB_PATH"] = os.path.join(dossier, "bench.db")
+    os.environ["PORT"] = "0"
+
+    import discord
+    import main
+    from utils.config import CANAL_LEADERBOARD_ID, ROLE_LADDER_ID, ROLE_LEAD_ID
+    from utils.metriques import METRIQUES
+
+    faux = FauxDiscord(latence=args.latence, limite=args.limite, fenetre=args.fenetre, taux_429=args.taux_429)
+    bot = main.bot
+    faux.installer(bot)  # avant setup_hook, pour que l'instrumentation enveloppe le faux réseau
+    state = bot._connection
+    state.application_id = APP_ID
+    state.user = discord.ClientUser(state=state, data=user_payload(BOT_ID, bot=True))
+    await bot._async_setup_hook()
+    await bot.setup_hook()
+    bot.screens._telecharger = faux.telecharger_screen  # les URLs de screens pointent vers le faux CDN
+
+    canaux = [PREMIER_CANAL + c for c in range(args.canaux)]
+    state._add_guild_from_data(guild_payload([*canaux, CANAL_LEADERBOARD_ID], [ROLE_LADDER_ID, ROLE_LEAD_ID]))
+
+    banc = Banc(bot, faux, args.pause, args.par_lot)
+    lead = membre_payload(PREMIER_JOUEUR - 1, roles=[ROLE_LEAD_ID])
+    validateur = membre_payload(PREMIER_JOUEUR - 2, roles=[ROLE_LADDER_ID])
+    debut, fin = datetime.now() - timedelta(hours=1), datetime.now() + timedelta(days=1)
+    await banc.commande(
+        "new", CANAL_LEADERBOARD_ID, lead, cible="Banc d'essai",
+        date_debut=debut.strftime("%d/%m/%Y"), heure_debut=debut.strftime("%H:%M"),
+        date_fin=fin.strftime("%d/%m/%Y"), heure_fin=fin.strftime("%H:%M"),
+    )
+
+    appels_avant = faux.appels
+    semaphore = asyncio.Semaphore(args.concurrence)
+    nb_refus = 0 if args.par_lot else round(args.combats * args.refus)
+    chrono = time.perf_counter()
+    # Le gestionnaire vise les joueurs des combats validés, crédités par le rédacteur en même temps
+    joueurs = [PREMIER_JOUEUR + i * 3 for i in range(nb_refus, args.combats)] or [PREMIER_JOUEUR]
+    await asyncio.gather(
+        banc.gerer(args.modifications, CANAL_LEADERBOARD_ID, lead, joueurs, args.pause_gestion),
+        *(
+            banc.jouer(i, canaux[i % len(canaux)], validateur, i < nb_refus, semaphore)
+            for i in range(args.combats)
+        ),
+    )
+    if args.par_lot:
+        await banc.valider_par_lot(canaux[0], validateur)
+    # Les edits différés (leaderboard, embeds) font partie du coût d'une validation
+    while len(bot.edit_scheduler):
+        await asyncio.sleep(0.1)
+    duree = time.perf_counter() - chrono
+    appels = faux.appels - appels_avant
+
+    rest = METRIQUES.histogrammes.get("bst_appels_rest_par_interaction", {})
+    handler = rest.get((("handler", "ValidationLadderView.valider"),))
+    modifier = rest.get((("handler", "modifier_joueur"),))
+    # Les appels des commandes du gestionnaire ne sont pas imputés aux combats
+    historique = rest.get((("handler", "historique"),))
+    appels -= int(sum(h.somme for h in (modifier, historique) if h is not None))
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # Kio sous Linux
+
+    print()
+    print(f"Combats joués      : {args.combats} ({banc.validations} validés, {banc.refus} refusés, {len(banc.echecs)} échecs)")
+    print(f"Interactions       : {banc.interactions} en {duree:.1f} s, soit {banc.interactions / duree:.0f} interactions/s")
+    print(f"Ack p50 / p99      : {centile(banc.acks, 50) * 1000:.1f} ms / {centile(banc.acks, 99) * 1000:.1f} ms")
+    if handler is not None and handler.total:
+        print(f"REST par valider   : {handler.somme / handler.total:.2f} dans le handler")
+    if banc.acks_gestion:
+        print(
+            f"Gestion            : {banc.modifications} /modifier_joueur, ack p50 / p99"
+            f" {centile(banc.acks_gestion, 50) * 1000:.1f} ms / {centile(banc.acks_gestion, 99) * 1000:.1f} ms"
+        )
+    if modifier is not None and modifier.total:
+        print(f"REST par modif     : {modifier.somme / modifier.total:.2f} dans le handler")
+    if banc.validations:
+        print(f"REST par combat    : {appels / (banc.validations + banc.refus):.2f} au total ({appels} appels)")
+    print(f"429 simulés        : {faux.rate_limits}")
+    print(f"Attente buckets    : {faux.attente_buckets:.1f} s cumulées")
+    print(f"Edits sans effet   : {bot.edit_scheduler.ignores} évités")
+    if bot.stats.actif:
+        # Premier agrégat après la dernière validation, puis le même servi par le mémo
+        debut = time.perf_counter()
+        bot.stats.par_joueur(GUILD_ID)
+        froid = time.perf_counter() - debut
+        debut = time.perf_counter()
+        bot.stats.par_joueur(GUILD_ID)
+        chaud = time.perf_counter() - debut
+        await banc.commande("stats", canaux[0], validateur)
+        await banc.commande("stats_export", canaux[0], lead)
+        print(f"Stats              : {len(bot.stats)} participation(s), agrégat {froid * 1000:.2f} ms puis {chaud * 1000:.3f} ms mémorisé")
+    # Modifications et validations concurrentes : le ledger rejoué doit redonner le classement en mémoire
+    leaderboard_cog = bot.get_cog("LeaderboardCog")
+    leaderboard_id = leaderboard_cog.leaderboard_du_canal(CANAL_LEADERBOARD_ID)
+    if leaderboard_id is not None:
+        rejoue = await bot.storage.rejouer(leaderboard_id)
+        en_memoire = dict(leaderboard_cog.leaderboards[leaderboard_id].classement.items())
+        print(f"Ledger rejoué      : {'conforme' if rejoue == en_memoire else 'DIVERGENT'} ({len(en_memoire)} joueur(s))")
+    erreurs = sum(METRIQUES.compteurs.get("bst_handler_erreurs_total", {}).values())
+    print(f"Handlers en erreur : {erreurs}")
+    print(f"RSS max            : {rss:.1f} Mio")
+    membres = sum(len(g.members) for g in bot.guilds)
+    print(f"Cache discord.py   : {len(bot.cached_messages)} message(s), {membres} membre(s)")
+    for echec in banc.echecs[:10]:
+        print(f"⚠️ {echec}")
+
+    await bot.close()
+    shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(principal(parser().parse_args()))
@@ -0,0 +1,296 @@
+# bench/faux_discord.py
+
+import asyncio
+import io
+import itertools
+import json
+import logging
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from discord.webhook.async_ import async_context
+
+APP_ID = 100000000000000001
+BOT_ID = 100000000000000002
+GUILD_ID = 100000000000000003
+DEBUT_IDS = 200000000000000000
+
+_log = logging.getLogger("discord.http")  # même logger que discord.py pour les 429
+
+
+class FauxDiscord:
+    """Discord en mémoire : répond aux routes REST utilisées par les cogs.
+
+    Remplace `bot.http.request` et l'adaptateur webhook des interactions, avant
+    toute instrumentation. Chaque appel subit une latence simulée, attend qu'une
+    place se libère au-delà de `limite` requêtes par `fenetre` secondes sur un
+    même bucket (route + canal), et reçoit un 429 avec une probabilité `taux_429`.
+    """
+
+    def __init__(self, latence=0.03, limite=5, fenetre=5.0, taux_429=0.0):
+        self.latence = latence
+        self.limite = limite
+        self.fenetre = fenetre
+        self.taux_429 = taux_429
+        self._ids = itertools.count(DEBUT_IDS)
+        self.messages = {}  # message_id -> payload
+        self.originaux = {}  # token d'interaction -> message_id de la réponse
+        self.interactions = {}  # interaction_id -> Suivi
+        self._buckets = {}  # (méthode, route, canal) -> deque des instants d'appel
+        self._attentes_messages = []  # (prédicat, future)
+        self.appels = 0
+        self.rate_limits = 0
+        self.attente_buckets = 0.0  # secondes cumulées d'attente préventive sur les buckets
+
+    def nouvel_id(self):
+        return next(self._ids)
+
+    def installer(self, bot):
+        bot.http.request = self.requete_http
+        async_context.get().request = self.requete_webhook
+
+    async def telecharger_screen(self, url):
+        """CDN simulé : une petite image propre à chaque URL"""
+        await asyncio.sleep(self.latence * random.uniform(0.5, 1.5))
+        return _image(url)
+
+    # ---------------------------
+    # Simulation du réseau
+    # ---------------------------
+    async def _reseau(self, route, canal):
+        self.appels += 1
+        await asyncio.sleep(self.latence * random.uniform(0.5, 1.5))
+        if self.taux_429 and random.random() < self.taux_429:
+            # 429 imprévu (sous-limite, limite globale) : discord.py logge puis réessaie
+            retry_after = random.uniform(0.1, 1.0)
+            self.rate_limits += 1
+            _log.warning(
+                "We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.",
+                route.method, route.url, retry_after,
+            )
+            await asyncio.sleep(retry_after)
+        if canal is None:
+            return
+        # Bucket glissant par route et canal ; discord.py attend de lui-même qu'il se libère
+        bucket = self._buckets.setdefault((route.method, route.path, canal), deque())
+        while True:
+            maintenant = time.perf_counter()
+            while bucket and bucket[0] <= maintenant - self.fenetre:
+                bucket.popleft()
+            if len(bucket) < self.limite:
+                bucket.append(maintenant)
+                return
+            attente = bucket[0] + self.fenetre - maintenant
+            self.attente_buckets += attente
+            await asyncio.sleep(attente)
+
+    async def requete_http(self, route, *, files=None, form=None, **kwargs):
+        await self._reseau(route, route.channel_id)
+        ids = [int(x) for x in re.findall(r"/(\d+)", route.url)]
+        if route.method == "POST" and route.path == "/channels/{channel_id}/messages":
+            return self._creer_message(route.channel_id, _payload(kwargs.get("json"), form))
+        if route.method == "PATCH" and route.path == "/channels/{channel_id}/messages/{message_id}":
+            return self._modifier_message(ids[-1], _payload(kwargs.get("json"), form))
+        if route.method == "PUT" and route.path.startswith("/applications/"):
+            return []
+        raise NotImplementedError(f"Route non simulée : {route.method} {route.path}")
+
+    async def requete_webhook(self, route, session=None, *, payload=None, multipart=None, **kwargs):
+        # Les interactions ne sont pas soumises aux buckets par canal
+        await self._reseau(route, None)
+        data = _payload(payload, multipart)
+        if route.path.endswith("/callback"):
+            return self._callback(route, data)
+        token = route.url.split("/webhooks/")[1].split("/")[1].split("?")[0]
+        suivi = self.interactions[int(token.removeprefix("jeton"))]
+        if route.method == "POST" and route.path == "/webhooks/{webhook_id}/{webhook_token}":
+            return self._creer_message(suivi.channel_id, data)  # followup
+        if "/messages/" in route.path:
+            message_id = self.originaux.get(token) if route.url.endswith("@original") else int(route.url.split("/")[-1])
+            if route.method == "GET":
+                return self.messages[message_id]
+            if route.method == "PATCH":
+                return self._modifier_message(message_id, data)
+            if route.method == "DELETE":
+                self.messages.pop(message_id, None)
+                return None
+        raise NotImplementedError(f"Route webhook non simulée : {route.method} {route.path}")
+
+    # ---------------------------
+    # Messages
+    # ---------------------------
+    def _creer_message(self, channel_id, data, auteur=None):
+        message = message_payload(self.nouvel_id(), channel_id, auteur or user_payload(BOT_ID, bot=True))
+        message.update({k: v for k, v in data.items() if k in ("content", "embeds", "components", "flags")})
+        self.messages[int(message["id"])] = message
+        for attente in list(self._attentes_messages):
+            predicat, future = attente
+            if not future.done() and predicat(message):
+                future.set_result(message)
+                self._attentes_messages.remove(attente)
+        return message
+
+    def _modifier_message(self, message_id, data):
+        message = self.messages[message_id]
+        message.update({k: v for k, v in data.items() if k in ("content", "embeds", "components")})
+        message["edited_timestamp"] = _maintenant()
+        return message
+
+    def attendre_message(self, predicat):
+        """Future résolue avec le prochain message du bot qui vérifie `predicat`"""
+        future = asyncio.get_running_loop().create_future()
+        self._attentes_messages.append((predicat, future))
+        return future
+
+    # ---------------------------
+    # Interactions
+    # ---------------------------
+    def _callback(self, route, data):
+        interaction_id = int(route.url.split("/interactions/")[1].split("/")[0])
+        token = route.url.split("/")[-2]
+        suivi = self.interactions[interaction_id]
+        suivi.ack = time.perf_counter() - suivi.debut
+        type_reponse = data["type"]
+        reponse = {"id": str(interaction_id), "type": suivi.type}
+        message = None
+        if type_reponse == 4:  # message
+            message = self._creer_message(suivi.channel_id, data.get("data", {}))
+            self.originaux[token] = int(message["id"])
+            reponse["response_message_id"] = message["id"]
+        elif type_reponse == 7:  # mise à jour du message cliqué
+            message = self._modifier_message(suivi.message_id, data.get("data", {}))
+        elif type_reponse == 9:  # modal
+            suivi.modal = data["data"]
+        suivi.repondu.set_result(message)
+        resultat = {"interaction": reponse}
+        if message is not None:
+            resultat["resource"] = {"type": type_reponse, "message": message}
+        return resultat
+
+    def interaction(self, type_, channel_id, membre, data, message=None):
+        """Payload INTERACTION_CREATE ; le suivi permet d'attendre l'acquittement"""
+        interaction_id = self.nouvel_id()
+        payload = {
+            "id": str(interaction_id),
+            "application_id": str(APP_ID),
+            "type": type_,
+            "token": f"jeton{interaction_id}",
+            "version": 1,
+            "guild_id": str(GUILD_ID),
+            "channel_id": str(channel_id),
+            "channel": {"id": str(channel_id), "type": 0, "guild_id": str(GUILD_ID), "name": f"canal-{channel_id}"},
+            "member": membre,
+            "data": data,
+            "app_permissions": "8",
+            "locale": "fr",
+            "guild_locale": "fr",
+            "entitlements": [],
+            "authorizing_integration_owners": {"0": str(GUILD_ID)},
+            "context": 0,
+            "attachment_size_limit": 8 * 1024 * 1024,
+        }
+        if message is not None:
+            payload["message"] = message
+        self.interactions[interaction_id] = Suivi(type_, channel_id, message)
+        return interaction_id, payload
+
+
+class Suivi:
+    __slots__ = ("type", "channel_id", "message_id", "debut", "ack", "modal", "repondu")
+
+    def __init__(self, type_, channel_id, message):
+        self.type = type_
+        self.channel_id = channel_id
+        self.message_id = int(message["id"]) if message else None
+        self.debut = time.perf_counter()
+        self.ack = None
+        self.modal = None
+        self.repondu = asyncio.get_running_loop().create_future()
+
+
+# ---------------------------
+# Payloads
+# ---------------------------
+def _maintenant():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _image(graine):
+    from PIL import Image  # seulement appelé quand l'ingestion des screens est active
+
+    bruit = random.Random(graine).randbytes(96 * 64)
+    sortie = io.BytesIO()
+    Image.frombytes("L", (96, 64), bruit).save(sortie, "PNG")
+    return sortie.getvalue()
+
+
+def _payload(json_, multipart):
+    if json_ is not None:
+        return json_
+    for partie in multipart or ():
+        if partie.get("name") == "payload_json":
+            return json.loads(partie["value"])
+    return {}
+
+
+def user_payload(user_id, bot=False):
+    return {"id": str(user_id), "username": f"joueur{user_id}", "discriminator": "0", "avatar": None, "global_name": None, "bot": bot}
+
+
+def membre_payload(user_id, roles=()):
+    return {
+        "user": user_payload(user_id),
+        "roles": [str(r) for r in roles],
+        "joined_at": _maintenant(),
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+        "permissions": "0",
+    }
+
+
+def message_payload(message_id, channel_id, auteur):
+    return {
+        "id": str(message_id),
+        "channel_id": str(channel_id),
+        "guild_id": str(GUILD_ID),
+        "author": auteur,
+        "content": "",
+        "timestamp": _maintenant(),
+        "edited_timestamp": None,
+        "tts": False,
+        "mention_everyone": False,
+        "mentions": [],
+        "mention_roles": [],
+        "attachments": [],
+        "embeds": [],
+        "pinned": False,
+        "type": 0,
+        "components": [],
+        "flags": 0,
+    }
+
+
+def guild_payload(canaux, roles):
+    return {
+        "id": str(GUILD_ID),
+        "name": "Banc d'essai",
+        "owner_id": str(BOT_ID),
+        "member_count": 0,
+        "roles": [
+            {"id": str(r), "name": f"role{r}", "color": 0, "hoist": False, "position": i, "permissions": "0",
+             "managed": False, "mentionable": True}
+            for i, r in enumerate((GUILD_ID, *roles))
+        ],
+        "channels": [
+            {"id": str(c), "type": 0, "name": f"canal-{c}", "position": i, "permission_overwrites": []}
+            for i, c in enumerate(canaux)
+        ],
+        "members": [],
+        "emojis": [],
+        "stickers": [],
+        "features": [],
+    }
@@ -0,0 +1,87 @@
+# bench/screens.py
+
+"""Banc de la détection des screens en double, sur des images locales.
+
+    python -m bench.screens captures/*.png --index 50000
+
+Chaque image est soumise pour un premier combat, puis une copie réduite et
+recompressée en JPEG pour un second : la copie doit être signalée. L'index
+est d'abord rempli de `--index` empreintes aléatoires pour mesurer la
+recherche à l'échelle de tout l'historique. Sans image, seules les
+recherches aléatoires sont chronométrées.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from utils import screens
+from utils.screens import IngestionScreens
+from utils.storage import Storage
+
+
+def parser():
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    p.add_argument("images", nargs="*", help="images servant de fixtures")
+    p.add_argument("--index", type=int, default=50000, help="empreintes aléatoires déjà indexées")
+    p.add_argument("--recherches", type=int, default=1000, help="recherches aléatoires chronométrées")
+    return p
+
+
+def copie_retouchee(octets):
+    """Même capture réduite de moitié et recompressée : un doublon tel qu'on le voit en pratique"""
+    with screens.Image.open(io.BytesIO(octets)) as image:
+        image = image.convert("RGB")
+        image = image.resize((max(1, image.width // 2), max(1, image.height // 2)))
+        sortie = io.BytesIO()
+        image.save(sortie, "JPEG", quality=70)
+    return sortie.getvalue()
+
+
+async def principal(args):
+    dossier = tempfile.mkdtemp(prefix="bst-screens-")
+    storage = Storage(os.path.join(dossier, "screens.db"))
+    ingestion = IngestionScreens(storage)
+    try:
+        debut = time.perf_counter()
+        for i in range(args.index):
+            ingestion.index.ajouter(random.getrandbits(64), (-i - 1, f"aleatoire-{i}"))
+        print(f"Index              : {len(ingestion.index)} empreintes en {time.perf_counter() - debut:.2f} s")
+
+        durees = []
+        for _ in range(args.recherches):
+            debut = time.perf_counter()
+            ingestion.index.proches(random.getrandbits(64))
+            durees.append(time.perf_counter() - debut)
+        print(f"Recherche          : {statistics.median(durees) * 1000:.2f} ms médiane, {max(durees) * 1000:.2f} ms max")
+
+        if not args.images:
+            return
+        if not ingestion.actif:
+            print("⚠️ Pillow absent : empreintes des images impossibles")
+            return
+        detectes = 0
+        for i, chemin in enumerate(args.images):
+            with open(chemin, "rb") as f:
+                octets = f.read()
+            await ingestion.indexer(1000 + i, [(chemin, octets)])
+            doublons = await ingestion.indexer(2000 + i, [(f"{chemin} (copie)", copie_retouchee(octets))])
+            if any(autre == chemin for _, autre, _ in doublons):
+                detectes += 1
+            else:
+                print(f"⚠️ Copie de {chemin} non détectée : {doublons}")
+        print(f"Copies détectées   : {detectes} / {len(args.images)}")
+    finally:
+        await ingestion.close()
+        await storage.close()
+        shutil.rmtree(dossier, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(principal(parser().parse_args()))
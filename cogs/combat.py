@@ -4,336 +4,851 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncio
+import math
+import os
+import sqlite3
 from datetime import datetime
 
+from utils import rendu
+from utils.memoire import taille_approx
+from utils.metriques import mesurer
+from utils.records import CombatRecord
+from utils.redacteur import CommandePoints, RedacteurFerme
+from utils.rendu import MAX_SCREENS
+from utils.screens import SCREENS_TAILLE_MAX
+
 MAX_JOUEURS = 4
-MAX_SCREENS = 5
-LADDER_ROLE_ID = 1459190410835660831
+PAGE_FILE = 10  # combats par page de la file de validation
+COMBAT_RENDER_INTERVAL = float(os.environ.get("COMBAT_RENDER_INTERVAL", "1.0"))  # secondes entre deux rendus d'un combat
+COMBAT_TTL = float(os.environ.get("COMBAT_TTL_HEURES", "48")) * 3600  # inactivité avant expiration d'un combat
+PURGE_INTERVALLE = float(os.environ.get("PURGE_COMBATS_HEURES", "1")) * 3600  # entre deux purges des combats expirés en base
+
+
+def vue_figee(view_cls, cog, desactivee=False):
+    """Instance de vue servant uniquement au rendu des boutons d'un message.
+
+    Arrêtée d'emblée, elle n'est pas enregistrée dans le ViewStore : les clics
+    sont routés par custom_id vers la vue persistante ajoutée au chargement du cog.
+    """
+    view = view_cls(cog)
+    if desactivee:
+        for child in view.children:
+            child.disabled = True
+    view.stop()
+    return view
+
+
+def resume(entete, lignes, limite=2000):
+    """Message récapitulatif tronqué à la limite de Discord"""
+    texte = entete
+    for i, ligne in enumerate(lignes):
+        reste = f"\n… et {len(lignes) - i} autre(s)"
+        if len(texte) + len(ligne) + 1 + len(reste) > limite:
+            return texte + reste
+        texte += "\n" + ligne
+    return texte
+
+
+async def repondre(interaction: discord.Interaction, contenu):
+    """Réponse éphémère, que l'interaction ait déjà été acquittée ou non"""
+    if interaction.response.is_done():
+        await interaction.followup.send(contenu, ephemeral=True)
+    else:
+        await interaction.response.send_message(contenu, ephemeral=True)
+
 
 class CombatCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.combats_en_cours = {}
+        self.combats_en_cours = {}  # (guild_id, joueur_id) -> CombatRecord, combats réhydratés en mémoire
+        self._par_message = {}  # message_id (combat ou validation) -> (guild_id, joueur_id)
+        self._chargements = {}  # critère de lecture -> tâche, pour ne lire la base qu'une fois
+        self._a_expirer = []  # combats échus en attente de nettoyage groupé
+        self._expiration_task = None
 
     async def cog_load(self):
-        print("✅ Cog Combat chargé et prêt")
+        # Une seule vue persistante par type, quel que soit le nombre de combats en
+        # attente : l'état d'un combat n'est relu en base qu'au premier clic
+        self.bot.add_view(CombatView(self))
+        self.bot.add_view(ValidationLadderView(self))
+        purges = await self.purger_combats()
+        print(f"✅ Cog Combat chargé et prêt ({purges} combat(s) expiré(s) purgé(s))")
+
+    # ---------------------------
+    # Accès aux combats (cache mémoire puis base)
+    # ---------------------------
+    async def combat_du_joueur(self, guild_id, joueur_id):
+        """Combat en cours du joueur sur ce serveur, ou None ; ceux d'autres serveurs ne comptent pas"""
+        combat = self.combats_en_cours.get((guild_id, joueur_id))
+        if combat is None:
+            combat = await self._charger(guild_id=guild_id, joueur_id=joueur_id)
+            # Combat d'avant le multi-serveur : son serveur n'est connu qu'une fois réhydraté
+            if combat is not None and combat.guild_id != guild_id:
+                return None
+        return combat
+
+    async def combat_du_message(self, message_id):
+        """Combat dont le message (combat ou validation) porte cet id, ou None"""
+        cle = self._par_message.get(message_id)
+        if cle is not None:
+            return self.combats_en_cours[cle]
+        return await self._charger(message_id=message_id)
+
+    async def _charger(self, **critere):
+        cle = tuple(critere.items())
+        tache = self._chargements.get(cle)
+        if tache is None:
+            # Les clics simultanés sur un même message partagent la même lecture
+            tache = asyncio.ensure_future(self._lire(**critere))
+            self._chargements[cle] = tache
+            tache.add_done_callback(lambda _: self._chargements.pop(cle, None))
+        return await asyncio.shield(tache)
+
+    async def _lire(self, **critere):
+        data = await self.bot.storage.charger_combat(**critere)
+        if data is None:
+            return None
+        return self._rehydrater(data)
+
+    async def combats_en_validation(self, guild_id):
+        """Combats du serveur en attente de validation, réhydratés au besoin, du plus ancien au plus récent"""
+        combats = []
+        for data in await self.bot.storage.combats_en_validation(guild_id):
+            combat = self._rehydrater(data)
+            if combat is not None and combat.status == "en_validation" and combat.guild_id == guild_id:
+                combats.append(combat)
+        return combats
+
+    def _rehydrater(self, data):
+        combat = CombatRecord.from_dict(data)
+        rattache = False
+        if combat.guild_id is None:
+            # Combat d'avant le multi-serveur : son salon donne le serveur, et sa clé en base
+            canal = self.bot.get_channel(combat.channel_id)
+            if canal is not None:
+                self.bot.storage.supprimer_combat(None, combat.joueur_id)
+                combat.guild_id = canal.guild.id
+                rattache = True
+        if combat.cle in self.combats_en_cours:
+            return self.combats_en_cours[combat.cle]
+
+        restant = combat.maj_le + COMBAT_TTL - datetime.now().timestamp()
+        if restant <= 0:
+            self.bot.storage.supprimer_combat(*combat.cle)
+            return None
+        self.indexer_combat(combat)
+        if rattache:
+            self.bot.storage.sauver_combat(*combat.cle, combat.to_dict())
+        self._planifier_expiration(combat.cle, restant)
+        return combat
+
+    def indexer_combat(self, combat):
+        self.combats_en_cours[combat.cle] = combat
+        self._par_message[combat.message_id] = combat.cle
+        if combat.validation_message_id is not None:
+            self._par_message[combat.validation_message_id] = combat.cle
+
+    def sauver_combat(self, cle):
+        """Planifie l'écriture en base de l'état d'un combat ; `cle` vaut (guild_id, joueur_id)"""
+        combat = self.combats_en_cours[cle]
+        combat.maj_le = datetime.now().timestamp()
+        combat.version += 1
+        self.bot.storage.sauver_combat(*cle, combat.to_dict())
+        # Toute activité repousse l'expiration
+        self._planifier_expiration(cle, COMBAT_TTL)
+
+    def terminer_combat(self, cle):
+        combat = self.combats_en_cours.pop(cle)
+        self._par_message.pop(combat.message_id, None)
+        self._par_message.pop(combat.validation_message_id, None)
+        self.bot.storage.supprimer_combat(*cle)
+        self.bot.timer_wheel.annuler(("combat", cle))
+
+    # ---------------------------
+    # Validation (unitaire ou par lot)
+    # ---------------------------
+    async def valider_combats(self, combats, validateur_id):
+        """Crédite les points des combats via le rédacteur de leur leaderboard et les termine.
+
+        Retourne (validés, ignorés) : un combat est ignoré si aucun leaderboard
+        ouvert ne couvre sa date, ou si le sien est clos avant d'avoir crédité les
+        points ; il reste alors en attente. Un combat déjà crédité (double clic,
+        lot et bouton en même temps) n'apparaît dans aucune des deux listes.
+        """
+        leaderboard_cog = self.bot.get_cog("LeaderboardCog")
+        ignores, soumis = [], []
+        for combat in combats:
+            leaderboard_id = None
+            if leaderboard_cog:
+                leaderboard_id = leaderboard_cog.leaderboard_actif(combat.guild_id, datetime.fromtimestamp(combat.cree_le))
+            if leaderboard_id is None:
+                ignores.append(combat)
+                continue
+            commande = CommandePoints(
+                "combat", validateur_id, combat_id=combat.message_id,
+                variations={joueur_id: combat.points for joueur_id in combat.joueurs},
+            )
+            try:
+                soumis.append((combat, leaderboard_id, leaderboard_cog.soumettre(leaderboard_id, commande)))
+            except RedacteurFerme:
+                ignores.append(combat)
+        # Le rédacteur rend le leaderboard une fois par lot, sans edit de notre part
+        valides = []
+        for combat, leaderboard_id, future in soumis:
+            try:
+                resultat = await future
+            except RedacteurFerme:
+                ignores.append(combat)
+                continue
+            if resultat is None:
+                # Crédité par un autre clic, qui termine le combat
+                continue
+            # Terminé seulement une fois crédité : jusque-là, il peut encore être validé
+            if self.combats_en_cours.get(combat.cle) is combat:
+                self.terminer_combat(combat.cle)
+            # Crédité une seule fois, donc jamais compté deux fois dans l'historique
+            self.bot.stats.enregistrer(combat, leaderboard_id)
+            valides.append(combat)
+        return valides, ignores
+
+    def desactiver_validations(self, combats):
+        """Grise les boutons des messages de validation, en différé via le planificateur"""
+        vue = vue_figee(ValidationLadderView, self, desactivee=True)
+        for combat in combats:
+            if combat.validation_message_id is not None:
+                self.bot.edit_scheduler.schedule(combat.validation_message(self.bot), view=vue)
+
+    # ---------------------------
+    # Rendu de l'embed du combat
+    # ---------------------------
+    def rafraichir_combat(self, combat):
+        """Marque l'embed comme à rafraîchir ; le rendu se fait au plus une fois par intervalle"""
+        self.bot.edit_scheduler.schedule(
+            combat.message(self.bot),
+            # Sans `view`, l'edit laisse les boutons du message inchangés
+            render=lambda: {"embed": rendu.embed_combat(combat)},
+            window=COMBAT_RENDER_INTERVAL,
+        )
+
+    # ---------------------------
+    # Expiration des combats abandonnés
+    # ---------------------------
+    def _planifier_expiration(self, cle, delai):
+        self.bot.timer_wheel.planifier(("combat", cle), max(delai, 0), self._expirer_combat)
+
+    def _expirer_combat(self, cle):
+        # Appelé par la roue pour chaque échéance ; le nettoyage est groupé par tick
+        self._a_expirer.append(cle[1])
+        if self._expiration_task is None:
+            self._expiration_task = asyncio.create_task(self._expirer_lot())
+
+    async def _expirer_lot(self):
+        cles, self._a_expirer = self._a_expirer, []
+        self._expiration_task = None
+        vues = self.vues_desactivees()
+        for cle in cles:
+            combat = self.combats_en_cours.get(cle)
+            if combat is None:
+                continue
+            self.desactiver_combat(combat.channel_id, combat.message_id, combat.validation_message_id, vues)
+            self.terminer_combat(cle)
+        if cles:
+            print(f"🧹 {len(cles)} combat(s) expiré(s) après {COMBAT_TTL / 3600:g} h d'inactivité")
+
+    async def purger_combats(self):
+        """Supprime de la base les combats expirés hors mémoire, qu'aucune échéance ne suit,
+        et grise leurs boutons ; se replanifie. Retourne leur nombre."""
+        self.bot.timer_wheel.planifier(("purge_combats",), PURGE_INTERVALLE, self._purge_echue)
+        purges = await self.bot.storage.purger_combats(datetime.now().timestamp() - COMBAT_TTL)
+        vues = self.vues_desactivees()
+        for channel_id, message_id, validation_message_id in purges:
+            self.desactiver_combat(channel_id, message_id, validation_message_id, vues)
+        return len(purges)
+
+    def _purge_echue(self, cle):
+        asyncio.create_task(self._purger_periodiquement())
+
+    async def _purger_periodiquement(self):
+        try:
+            purges = await self.purger_combats()
+        except sqlite3.Error as e:
+            print(f"⚠️ Purge des combats expirés impossible : {e}")
+            return
+        if purges:
+            print(f"🧹 {purges} combat(s) expiré(s) purgé(s) de la base")
+
+    def vues_desactivees(self):
+        return vue_figee(CombatView, self, desactivee=True), vue_figee(ValidationLadderView, self, desactivee=True)
+
+    def desactiver_combat(self, channel_id, message_id, validation_message_id=None, vues=None):
+        """Grise les boutons du message d'un combat et de sa validation ; les edits partent
+        groupés par canal via le planificateur"""
+        combat_desactive, validation_desactivee = vues or self.vues_desactivees()
+        canal = self.bot.get_partial_messageable(channel_id)
+        self.bot.edit_scheduler.schedule(canal.get_partial_message(message_id), view=combat_desactive)
+        if validation_message_id is not None:
+            self.bot.edit_scheduler.schedule(canal.get_partial_message(validation_message_id), view=validation_desactivee)
+
+    @app_commands.command(name="admin_stats", description="Statistiques internes du bot")
+    @app_commands.default_permissions(administrator=True)
+    @mesurer("admin_stats")
+    async def admin_stats(self, interaction: discord.Interaction):
+        octets = taille_approx(self.combats_en_cours)
+        leaderboard_cog = self.bot.get_cog("LeaderboardCog")
+        nb_leaderboards = len(leaderboard_cog.leaderboards) if leaderboard_cog else 0
+        en_attente = leaderboard_cog.commandes_en_attente() if leaderboard_cog else 0
+        lignes = [
+            f"⚔️ Combats en mémoire : {len(self.combats_en_cours)} (~{octets / 1024:.1f} Kio)",
+            f"🧩 Vues persistantes : {len(self.bot.persistent_views)}",
+            f"📊 Leaderboards en mémoire : {nb_leaderboards} ({en_attente} changement(s) de points en file)",
+            f"⏱️ Échéances planifiées : {len(self.bot.timer_wheel)}",
+            f"📅 Ouvertures et clôtures planifiées : {len(self.bot.echeancier)}",
+            f"📤 Requêtes en file sortante : {len(self.bot.file_sortante)} ({self.bot.file_sortante.jetons:.0f} jeton(s) disponibles)",
+            f"🎨 Rendus réutilisés : {rendu.COMBATS.hits + rendu.LEADERBOARDS.hits}, "
+            f"edits sans effet évités : {self.bot.edit_scheduler.ignores}",
+            f"🖼️ Screens indexés : {len(self.bot.screens.index)}",
+            f"📈 Historique des stats : {len(self.bot.stats)} ligne(s) en colonnes",
+            f"⌛ Expiration après {COMBAT_TTL / 3600:g} h d'inactivité",
+        ]
+        await interaction.response.send_message("\n".join(lignes), ephemeral=True)
 
     @app_commands.command(name="add_screen", description="Ajouter un combat")
+    @mesurer("add_screen")
     async def add_screen(self, interaction: discord.Interaction):
         joueur_id = interaction.user.id
-        if joueur_id in self.combats_en_cours:
+        if await self.combat_du_joueur(interaction.guild_id, joueur_id) is not None:
             await interaction.response.send_message(
-                "❌ Tu as déjà un combat en cours. Termine-le avant d'en lancer un autre.",
+                "❌ Tu as déjà un combat en cours sur ce serveur. Termine-le avant d'en lancer un autre.",
                 ephemeral=True
             )
             return
 
-        view = CombatView(self, joueur_id)
-        embed = discord.Embed(
-            title="📊 Ajout d’un combat au ladder purgatoire",
-            description="Validation en attente ⏳",
-            color=0x5865F2
+        # Rendu avant l'envoi : le message n'existe pas encore, rien n'est mémorisé
+        combat = CombatRecord(joueur_id, interaction.channel_id, None, guild_id=interaction.guild_id)
+        reponse = await interaction.response.send_message(
+            embed=rendu.embed_combat(combat), view=vue_figee(CombatView, self), ephemeral=False
+        )
+        # Message rendu par le callback lui-même (discord.py ≥ 2.5) : indexé sans second aller-retour
+        message = getattr(reponse, "resource", None)
+        if not isinstance(message, discord.InteractionMessage):
+            message = await interaction.original_response()
+        combat.message_id = message.id
+        self.indexer_combat(combat)
+        self.sauver_combat(combat.cle)
+
+    @app_commands.command(name="ajouter_screen", description="Joindre des screens à ton combat en cours")
+    @app_commands.describe(
+        screen="Capture du combat",
+        screen_2="Capture supplémentaire (optionnelle)",
+        screen_3="Capture supplémentaire (optionnelle)"
+    )
+    @mesurer("ajouter_screen")
+    async def ajouter_screen(
+        self,
+        interaction: discord.Interaction,
+        screen: discord.Attachment,
+        screen_2: discord.Attachment = None,
+        screen_3: discord.Attachment = None
+    ):
+        combat = await self.combat_du_joueur(interaction.guild_id, interaction.user.id)
+        if combat is None:
+            await interaction.response.send_message(
+                "❌ Tu n'as pas de combat en cours sur ce serveur, lance-le avec /add_screen.", ephemeral=True
+            )
+            return
+        if combat.status != "en_cours":
+            await interaction.response.send_message("❌ Ce combat a déjà été envoyé en validation.", ephemeral=True)
+            return
+
+        pieces = [p for p in (screen, screen_2, screen_3) if p is not None]
+        if any(p.content_type and not p.content_type.startswith("image/") for p in pieces):
+            await interaction.response.send_message("❌ Seules les images sont acceptées.", ephemeral=True)
+            return
+        ajoutes = pieces[:MAX_SCREENS - len(combat.screens)]
+        if not ajoutes:
+            await interaction.response.send_message(f"❌ Ce combat a déjà {MAX_SCREENS} screens.", ephemeral=True)
+            return
+
+        combat.screens += [p.url for p in ajoutes]
+        self.sauver_combat(combat.cle)
+        self.rafraichir_combat(combat)
+        await interaction.response.send_message(
+            f"✅ {len(ajoutes)} screen(s) ajouté(s) ({len(combat.screens)} / {MAX_SCREENS}).", ephemeral=True
         )
-        embed.add_field(name="👥 Joueurs présents", value=interaction.user.mention)
-        embed.add_field(name="💠 Points du combat", value="—")
-        embed.add_field(name="💰 Points par joueur", value="0 pts")
-        embed.add_field(name="🖼️ Screens ajoutés", value="0 / 5")
-
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=False)
-        message = await interaction.original_response()
-        self.combats_en_cours[joueur_id] = {
-            "status": "en_cours",
-            "joueurs_present": [interaction.user],
-            "type": None,
-            "aucun_mort": False,
-            "superiorite": False,
-            "inferiorite": False,
-            "points": 0,
-            "bonus": {"aucun_mort": 0, "attaque": 0, "defense": 0, "superiorite": 0, "inferiorite": 0},
-            "message": message,
-            "view": view,
-            "screens": [],
-        }
+
+        # Après l'acquittement : les screens déjà vus sur d'autres combats sont signalés aux validateurs
+        pieces_analysables = [p.url for p in ajoutes if p.size <= SCREENS_TAILLE_MAX]
+        doublons = await self.bot.screens.ingerer(combat.message_id, pieces_analysables)
+        if doublons and self.combats_en_cours.get(combat.cle) is combat:
+            combat.doublons += doublons
+            self.sauver_combat(combat.cle)
+            if combat.validation_message_id is not None:
+                # Envoyé en validation pendant l'analyse : les validateurs doivent quand même le voir
+                self.bot.edit_scheduler.schedule(combat.validation_message(self.bot), embed=rendu.embed_validation(combat))
 
     @app_commands.command(name="reset_combat", description="Réinitialiser ton combat en cours")
+    @mesurer("reset_combat")
     async def reset_combat(self, interaction: discord.Interaction):
-        joueur_id = interaction.user.id
-        if joueur_id in self.combats_en_cours:
-            del self.combats_en_cours[joueur_id]
+        combat = await self.combat_du_joueur(interaction.guild_id, interaction.user.id)
+        if combat is not None:
+            self.desactiver_combat(combat.channel_id, combat.message_id, combat.validation_message_id)
+            self.terminer_combat(combat.cle)
             await interaction.response.send_message("✅ Ton combat en cours a été réinitialisé.", ephemeral=True)
         else:
-            await interaction.response.send_message("❌ Tu n'as pas de combat en cours.", ephemeral=True)
+            await interaction.response.send_message("❌ Tu n'as pas de combat en cours sur ce serveur.", ephemeral=True)
+
+    @app_commands.command(name="file_validation", description="Valider ou refuser plusieurs combats en attente")
+    @mesurer("file_validation")
+    async def file_validation(self, interaction: discord.Interaction):
+        if not self.bot.configs.pour(interaction.guild_id).est_validateur(interaction.user):
+            await interaction.response.send_message("❌ Seuls les membres du rôle ladder peuvent valider.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        combats = await self.combats_en_validation(interaction.guild_id)
+        if not combats:
+            await interaction.followup.send("✅ Aucun combat en attente de validation.", ephemeral=True)
+            return
+        view = FileValidationView(self, interaction.user.id, interaction.guild_id, combats)
+        await interaction.followup.send(embed=view.rendu(), view=view, ephemeral=True)
 
 
 # ---------------------------
-# Vue principale avec boutons joueurs
+# Vue principale avec boutons joueurs (persistante)
 # ---------------------------
 class CombatView(discord.ui.View):
     BONUS_POINTS = {"aucun_mort": 3, "attaque": 5, "defense": 5, "superiorite": -2, "inferiorite": 3}
 
-    def __init__(self, cog, joueur_id):
+    def __init__(self, cog):
         super().__init__(timeout=None)
         self.cog = cog
-        self.joueur_id = joueur_id
+
+    async def _combat(self, interaction: discord.Interaction):
+        """Combat du message cliqué ; désactive les boutons s'il n'existe plus.
+
+        Un combat est indexé dès le retour de son envoi : absent de la mémoire
+        comme de la base, il est bien terminé.
+        """
+        combat = await self.cog.combat_du_message(interaction.message.id)
+        if combat is None:
+            await repondre(interaction, "❌ Combat introuvable ou expiré.")
+            self.cog.bot.edit_scheduler.schedule(interaction.message, view=vue_figee(CombatView, self.cog, desactivee=True))
+        return combat
 
     # ----- Boutons joueurs -----
-    @discord.ui.button(label="🗡️ Attaque", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="🗡️ Attaque", style=discord.ButtonStyle.red, custom_id="combat:attaque")
+    @mesurer("CombatView.attaque")
     async def attaque(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.set_type(interaction, "Attaque")
 
-    @discord.ui.button(label="🛡️ Defense", style=discord.ButtonStyle.red)  # Pas d'accent pour éviter erreur
+    @discord.ui.button(label="🛡️ Defense", style=discord.ButtonStyle.red, custom_id="combat:defense")  # Pas d'accent pour éviter erreur
+    @mesurer("CombatView.defense")
     async def defense(self, interaction: discord.Interaction, button: discord.ui.Button):
         await self.set_type(interaction, "Defense")
 
-    @discord.ui.button(label="➕ Ajouter joueurs", style=discord.ButtonStyle.blurple)
+    @discord.ui.button(label="➕ Ajouter joueurs", style=discord.ButtonStyle.blurple, custom_id="combat:ajouter_joueurs")
+    @mesurer("CombatView.ajouter_joueurs")
     async def ajouter_joueurs(self, interaction: discord.Interaction, button: discord.ui.Button):
-        view = AjouterJoueursView(self.cog, self.joueur_id)
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        view = AjouterJoueursView(self.cog, combat.cle)
         await interaction.response.send_message(
             "Sélectionne les joueurs à ajouter ⬇️",
             view=view,
             ephemeral=True
         )
 
-    @discord.ui.button(label="☠️ Aucun mort", style=discord.ButtonStyle.gray)
+    @discord.ui.button(label="☠️ Aucun mort", style=discord.ButtonStyle.gray, custom_id="combat:aucun_mort")
+    @mesurer("CombatView.aucun_mort")
     async def aucun_mort(self, interaction: discord.Interaction, button: discord.ui.Button):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-        combat["aucun_mort"] = not combat["aucun_mort"]
-        combat["bonus"]["aucun_mort"] = self.BONUS_POINTS["aucun_mort"] if combat["aucun_mort"] else 0
-        combat["points"] = sum(combat["bonus"].values())
-        await self.update_embed(combat)
         await interaction.response.defer()
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        combat.aucun_mort = not combat.aucun_mort
+        combat.bonus["aucun_mort"] = self.BONUS_POINTS["aucun_mort"] if combat.aucun_mort else 0
+        self.cog.sauver_combat(combat.cle)
+        self.cog.rafraichir_combat(combat)
 
-    @discord.ui.button(label="⬆️ Supériorité", style=discord.ButtonStyle.gray)
+    @discord.ui.button(label="⬆️ Supériorité", style=discord.ButtonStyle.gray, custom_id="combat:superiorite")
+    @mesurer("CombatView.superiorite")
     async def superiorite(self, interaction: discord.Interaction, button: discord.ui.Button):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-        combat["superiorite"] = not combat["superiorite"]
-        combat["inferiorite"] = False
-        combat["bonus"]["superiorite"] = self.BONUS_POINTS["superiorite"] if combat["superiorite"] else 0
-        combat["bonus"]["inferiorite"] = 0
-        combat["points"] = sum(combat["bonus"].values())
-        await self.update_embed(combat)
         await interaction.response.defer()
-
-    @discord.ui.button(label="⬇️ Infériorité", style=discord.ButtonStyle.gray)
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        combat.superiorite = not combat.superiorite
+        combat.inferiorite = False
+        combat.bonus["superiorite"] = self.BONUS_POINTS["superiorite"] if combat.superiorite else 0
+        combat.bonus["inferiorite"] = 0
+        self.cog.sauver_combat(combat.cle)
+        self.cog.rafraichir_combat(combat)
+
+    @discord.ui.button(label="⬇️ Infériorité", style=discord.ButtonStyle.gray, custom_id="combat:inferiorite")
+    @mesurer("CombatView.inferiorite")
     async def inferiorite(self, interaction: discord.Interaction, button: discord.ui.Button):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-        combat["inferiorite"] = not combat["inferiorite"]
-        combat["superiorite"] = False
-        combat["bonus"]["inferiorite"] = self.BONUS_POINTS["inferiorite"] if combat["inferiorite"] else 0
-        combat["bonus"]["superiorite"] = 0
-        combat["points"] = sum(combat["bonus"].values())
-        await self.update_embed(combat)
         await interaction.response.defer()
-
-    @discord.ui.button(label="🖼️ Ajouter screen(s)", style=discord.ButtonStyle.gray)
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        combat.inferiorite = not combat.inferiorite
+        combat.superiorite = False
+        combat.bonus["inferiorite"] = self.BONUS_POINTS["inferiorite"] if combat.inferiorite else 0
+        combat.bonus["superiorite"] = 0
+        self.cog.sauver_combat(combat.cle)
+        self.cog.rafraichir_combat(combat)
+
+    @discord.ui.button(label="🖼️ Ajouter screen(s)", style=discord.ButtonStyle.gray, custom_id="combat:ajouter_screens")
+    @mesurer("CombatView.ajouter_screens")
     async def ajouter_screens(self, interaction: discord.Interaction, button: discord.ui.Button):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-
-        def check(msg):
-            return msg.author.id == self.joueur_id and msg.attachments
-
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        # Les pièces jointes arrivent avec la commande : aucun message à lire dans le canal
         await interaction.response.send_message(
-            f"Envoie jusqu'à {MAX_SCREENS - len(combat['screens'])} screen(s) dans ce canal.",
+            f"🖼️ Utilise **/ajouter_screen** pour joindre jusqu'à {MAX_SCREENS - len(combat.screens)} screen(s) à ce combat.",
             ephemeral=True
         )
 
-        try:
-            msg = await self.cog.bot.wait_for("message", check=check, timeout=300)
-        except asyncio.TimeoutError:
-            await interaction.followup.send("⏰ Temps écoulé, screens non ajoutés.", ephemeral=True)
-            return
-
-        for att in msg.attachments:
-            if len(combat["screens"]) < MAX_SCREENS:
-                combat["screens"].append(att.url)
-
-        await self.update_embed(combat)
-        await interaction.followup.send(f"✅ {len(msg.attachments)} screen(s) ajoutés.", ephemeral=True)
-
-    @discord.ui.button(label="✅ Valider combat", style=discord.ButtonStyle.green)
+    @discord.ui.button(label="✅ Valider combat", style=discord.ButtonStyle.green, custom_id="combat:valider")
+    @mesurer("CombatView.valider_combat")
     async def valider_combat(self, interaction: discord.Interaction, button: discord.ui.Button):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-        if not combat["screens"]:
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        if combat.status != "en_cours":
+            await interaction.response.send_message("❌ Ce combat a déjà été envoyé en validation.", ephemeral=True)
+            return
+        if not combat.screens:
             await interaction.response.send_message("❌ Tu dois ajouter au moins un screen avant de valider.", ephemeral=True)
             return
 
+        # Désactiver les boutons du joueur (acquitte aussi le clic)
+        combat.status = "en_validation"
+        await interaction.response.edit_message(view=vue_figee(CombatView, self.cog, desactivee=True))
+
         # Envoi du message de validation pour le ladder
-        view = ValidationLadderView(self.cog, self.joueur_id)
-        date_now = datetime.now().strftime("%d/%m/%Y %H:%M")
-        embed = discord.Embed(
-            title="📊 Validation combat",
-            description=f"📅 Date: {date_now}\n🧾 Détail du combat",
-            color=0xF1C40F
-        )
-        points_lines = []
-        if combat['bonus']['attaque'] > 0: points_lines.append(f"🗡️ Attaque : +{combat['bonus']['attaque']} pts")
-        if combat['bonus']['defense'] > 0: points_lines.append(f"🛡️ Défense : +{combat['bonus']['defense']} pts")
-        if combat['bonus']['aucun_mort'] > 0: points_lines.append(f"☠️ Aucun mort : +{combat['bonus']['aucun_mort']} pts")
-        if combat['bonus']['superiorite'] != 0 or combat['bonus']['inferiorite'] != 0:
-            val = combat['bonus']['superiorite'] + combat['bonus']['inferiorite']
-            points_lines.append(f"⚖️ Supériorité / Infériorité : {val:+} pts")
-        embed.add_field(name="👥 Joueurs", value=", ".join([m.mention for m in combat["joueurs_present"]]))
-        embed.add_field(name="💠 Points", value="\n".join(points_lines) if points_lines else "0 pts")
-        embed.add_field(name="💰 Total par joueur", value=f"{combat['points']} pts")
-        if combat['screens']:
-            embed.add_field(name="🖼️ Screens", value="\n".join(combat['screens']))
-
-        await combat["message"].channel.send(
-            content=f"<@&{LADDER_ROLE_ID}> merci de valider ou refuser ce combat ⏳",
-            embed=embed,
-            view=view,
+        message = await interaction.channel.send(
+            content=f"<@&{self.cog.bot.configs.pour(combat.guild_id).role_ladder_id}> merci de valider ou refuser ce combat ⏳",
+            embed=rendu.embed_validation(combat),
+            view=vue_figee(ValidationLadderView, self.cog),
             allowed_mentions=discord.AllowedMentions(roles=True)
         )
-
-        # Désactiver les boutons du joueur
-        for child in self.children:
-            child.disabled = True
-        await combat["message"].edit(view=self)
+        combat.validation_message_id = message.id
+        self.cog.indexer_combat(combat)
+        self.cog.sauver_combat(combat.cle)
 
 # ----- Fonctions utilitaires -----
     async def set_type(self, interaction: discord.Interaction, combat_type: str):
-        combat = self.cog.combats_en_cours[self.joueur_id]
-        key = "attaque" if combat_type.lower() == "attaque" else "defense"
-        combat["type"] = combat_type
-        combat["bonus"][key] = self.BONUS_POINTS[key]
-        combat["points"] = sum(combat["bonus"].values())
-        await self.update_embed(combat)
         await interaction.response.defer()
-
-    async def update_embed(self, combat):
-        points_lines = []
-        if combat['bonus']['attaque'] > 0: points_lines.append(f"🗡️ Attaque : +{combat['bonus']['attaque']} pts")
-        if combat['bonus']['defense'] > 0: points_lines.append(f"🛡️ Défense : +{combat['bonus']['defense']} pts")
-        if combat['bonus']['aucun_mort'] > 0: points_lines.append(f"☠️ Aucun mort : +{combat['bonus']['aucun_mort']} pts")
-        if combat['bonus']['superiorite'] != 0 or combat['bonus']['inferiorite'] != 0:
-            val = combat['bonus']['superiorite'] + combat['bonus']['inferiorite']
-            points_lines.append(f"⚖️ Supériorité / Infériorité : {val:+} pts")
-        embed = discord.Embed(
-            title="📊 Ajout d’un combat au ladder purgatoire",
-            description="Validation en attente ⏳",
-            color=0x5865F2
-        )
-        embed.add_field(name="👥 Joueurs présents", value=", ".join([m.mention for m in combat["joueurs_present"]]))
-        embed.add_field(name="💠 Points du combat", value="\n".join(points_lines) if points_lines else "—")
-        embed.add_field(name="💰 Points par joueur", value=f"{combat['points']} pts")
-        embed.add_field(name="🖼️ Screens ajoutés", value=f"{len(combat['screens'])} / {MAX_SCREENS}")
-        await combat["message"].edit(embed=embed, view=combat["view"])
+        combat = await self._combat(interaction)
+        if combat is None:
+            return
+        key = "attaque" if combat_type.lower() == "attaque" else "defense"
+        combat.type = combat_type
+        combat.bonus[key] = self.BONUS_POINTS[key]
+        self.cog.sauver_combat(combat.cle)
+        self.cog.rafraichir_combat(combat)
 
 
 # ---------------------------
 # Vue pour sélectionner les joueurs
 # ---------------------------
 class AjouterJoueursView(discord.ui.View):
-    def __init__(self, cog, joueur_id):
+    def __init__(self, cog, cle):
         super().__init__(timeout=900)
         self.cog = cog
-        self.joueur_id = joueur_id
-        self.add_item(JoueurSelect(cog, joueur_id))
+        self.cle = cle
+        self.add_item(JoueurSelect(cog, cle))
 
 class JoueurSelect(discord.ui.UserSelect):
-    def __init__(self, cog, joueur_id):
+    def __init__(self, cog, cle):
         super().__init__(max_values=MAX_JOUEURS, placeholder="Recherche un membre...")
         self.cog = cog
-        self.joueur_id = joueur_id
+        self.cle = cle  # (guild_id, joueur_id) du combat
 
+    @mesurer("JoueurSelect.callback")
     async def callback(self, interaction: discord.Interaction):
-        combat = self.cog.combats_en_cours[self.joueur_id]
+        combat = self.cog.combats_en_cours.get(self.cle)
+        if combat is None:
+            await interaction.response.edit_message(content="❌ Combat introuvable ou expiré.", view=None)
+            return
         for member in self.values:
-            if member not in combat["joueurs_present"] and len(combat["joueurs_present"]) < MAX_JOUEURS:
-                combat["joueurs_present"].append(member)
-        combat["points"] = sum(combat["bonus"].values())
+            if member.id not in combat.joueurs and len(combat.joueurs) < MAX_JOUEURS:
+                combat.joueurs.append(member.id)
+        self.cog.sauver_combat(self.cle)
         await interaction.response.edit_message(content="✅ Joueurs ajoutés !", view=None)
-        await combat["view"].update_embed(combat)
+        self.cog.rafraichir_combat(combat)
 
 
 # ---------------------------
-# Vue pour le ladder valider/refuser
+# Vue pour le ladder valider/refuser (persistante)
 # ---------------------------
 class ValidationLadderView(discord.ui.View):
-    def __init__(self, cog, joueur_id):
+    def __init__(self, cog):
         super().__init__(timeout=None)
         self.cog = cog
-        self.joueur_id = joueur_id
 
-    @discord.ui.button(label="✅ Valider", style=discord.ButtonStyle.green)
+    async def _combat(self, interaction: discord.Interaction):
+        """Combat du message de validation cliqué ; désactive les boutons s'il n'existe plus"""
+        combat = await self.cog.combat_du_message(interaction.message.id)
+        if combat is None:
+            await repondre(interaction, "❌ Combat introuvable ou déjà traité.")
+            self.cog.bot.edit_scheduler.schedule(
+                interaction.message, view=vue_figee(ValidationLadderView, self.cog, desactivee=True)
+            )
+        return combat
+
+    @discord.ui.button(label="✅ Valider", style=discord.ButtonStyle.green, custom_id="validation:valider")
+    @mesurer("ValidationLadderView.valider")
     async def valider(self, interaction: discord.Interaction, button: discord.ui.Button):
         # Vérifie rôle ladder
-        if LADDER_ROLE_ID not in [r.id for r in interaction.user.roles]:
+        if not self.cog.bot.configs.pour(interaction.guild_id).est_validateur(interaction.user):
             await interaction.response.send_message("❌ Seuls les membres du rôle ladder peuvent valider.", ephemeral=True)
             return
 
-        combat = self.cog.combats_en_cours.get(self.joueur_id)
-        if not combat:
-            await interaction.response.send_message("❌ Combat introuvable ou déjà traité.", ephemeral=True)
+        combat = await self._combat(interaction)
+        if combat is None:
             return
 
-        # Mettre à jour leaderboard
-        leaderboard_cog = self.cog.bot.get_cog("LeaderboardCog")
-        if leaderboard_cog:
-            for joueur in combat["joueurs_present"]:
-                leaderboard = list(leaderboard_cog.leaderboards.values())[-1]  # dernier leaderboard
-                leaderboard["classement"][joueur.id] = leaderboard["classement"].get(joueur.id, 0) + combat["points"]
-                # Mettre à jour embed
-                classement_txt = "\n".join([f"<@{j}> : {pts} pts" for j, pts in sorted(leaderboard["classement"].items(), key=lambda x: -x[1])])
-                await leaderboard["message"].edit(embed=discord.Embed(
-                    title="📊 Leaderboard purgatoire",
-                    description=f"🎯 **Cible :** {leaderboard['cible']}",
-                    color=0x5865F2
-                ).add_field(name="🏆 Classement", value=classement_txt or "*(vide)*"))
+        # Mettre à jour le leaderboard dont la période couvre le combat
+        valides, ignores = await self.cog.valider_combats([combat], interaction.user.id)
+        if ignores:
+            await interaction.response.send_message(
+                "❌ Aucun leaderboard ouvert ne couvre ce combat (il est peut-être déjà clos).", ephemeral=True
+            )
+            return
+        if not valides:
+            await interaction.response.send_message("❌ Combat déjà validé.", ephemeral=True)
+            return
 
         # Message public
         date_now = datetime.now().strftime("%d/%m/%Y %H:%M")
         await interaction.response.send_message(
-            f"✅ Combat du {date_now} publié par {combat['joueurs_present'][0].mention} validé par {interaction.user.mention} !",
+            f"✅ Combat du {date_now} publié par <@{combat.joueurs[0]}> validé par {interaction.user.mention} !",
             ephemeral=False
         )
 
-        # Désactiver boutons
-        for child in self.children:
-            child.disabled = True
-        await interaction.message.edit(view=self)
-
-        del self.cog.combats_en_cours[self.joueur_id]
+        # Désactiver boutons, en différé : l'interaction est déjà acquittée
+        self.cog.bot.edit_scheduler.schedule(
+            interaction.message, view=vue_figee(ValidationLadderView, self.cog, desactivee=True)
+        )
 
-    @discord.ui.button(label="❌ Refuser", style=discord.ButtonStyle.red)
+    @discord.ui.button(label="❌ Refuser", style=discord.ButtonStyle.red, custom_id="validation:refuser")
+    @mesurer("ValidationLadderView.refuser")
     async def refuser(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if LADDER_ROLE_ID not in [r.id for r in interaction.user.roles]:
+        if not self.cog.bot.configs.pour(interaction.guild_id).est_validateur(interaction.user):
             await interaction.response.send_message("❌ Seuls les membres du rôle ladder peuvent refuser.", ephemeral=True)
             return
 
-        combat = self.cog.combats_en_cours.get(self.joueur_id)
-        if not combat:
-            await interaction.response.send_message("❌ Combat introuvable ou déjà traité.", ephemeral=True)
+        combat = await self._combat(interaction)
+        if combat is None:
             return
 
-        # Demande motif
-        await interaction.response.send_message("✏️ Saisis le motif du refus :", ephemeral=True)
-        try:
-            msg = await self.cog.bot.wait_for(
-                "message",
-                check=lambda m: m.author == interaction.user,
-                timeout=300
-            )
-        except asyncio.TimeoutError:
-            await interaction.followup.send("⏰ Temps écoulé, refus annulé.", ephemeral=True)
+        # Demande motif via un formulaire : aucun message à écouter
+        await interaction.response.send_modal(MotifRefusModal(self.cog, combat.cle, interaction.message))
+
+
+# ---------------------------
+# Formulaire du motif de refus
+# ---------------------------
+class MotifRefusModal(discord.ui.Modal, title="Refus du combat"):
+    motif = discord.ui.TextInput(
+        label="Motif du refus",
+        style=discord.TextStyle.paragraph,
+        max_length=500
+    )
+
+    def __init__(self, cog, cle, message):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.cle = cle  # (guild_id, joueur_id) du combat
+        self.message = message
+
+    @mesurer("MotifRefusModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        combat = self.cog.combats_en_cours.get(self.cle)
+        if not combat:
+            await interaction.response.send_message("❌ Combat introuvable ou déjà traité.", ephemeral=True)
             return
 
-        motif = msg.content
         date_now = datetime.now().strftime("%d/%m/%Y %H:%M")
-        await interaction.followup.send(
-            f"❌ Combat du {date_now} publié par {combat['joueurs_present'][0].mention} refusé par {interaction.user.mention} pour motif suivant : {motif}",
+        await interaction.response.send_message(
+            f"❌ Combat du {date_now} publié par <@{combat.joueurs[0]}> refusé par {interaction.user.mention} pour motif suivant : {self.motif.value}",
             ephemeral=False
         )
 
-        for child in self.children:
-            child.disabled = True
-        await interaction.message.edit(view=self)
+        self.cog.terminer_combat(self.cle)
+        self.cog.bot.edit_scheduler.schedule(self.message, view=vue_figee(ValidationLadderView, self.cog, desactivee=True))
+
+
+# ---------------------------
+# File de validation par lot (éphémère)
+# ---------------------------
+class FileValidationView(discord.ui.View):
+    """Combats en attente, paginés ; la sélection est conservée d'une page à l'autre.
+
+    Un lot ne coûte qu'un edit de cette vue, un message récapitulatif et un
+    rendu par leaderboard touché ; les messages de validation sont grisés en
+    différé par le planificateur.
+    """
+
+    def __init__(self, cog, validateur_id, guild_id, combats):
+        super().__init__(timeout=900)
+        self.cog = cog
+        self.validateur_id = validateur_id
+        self.guild_id = guild_id  # la file ne contient que les combats de ce serveur
+        self.joueur_ids = [combat.joueur_id for combat in combats]
+        self.selection = set()
+        self.page = 0
+        self.menu = SelectionCombats(self)
+        self.add_item(self.menu)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        return interaction.user.id == self.validateur_id
+
+    def _combat(self, joueur_id):
+        return self.cog.combats_en_cours.get((self.guild_id, joueur_id))
+
+    def _en_attente(self, joueur_id):
+        combat = self._combat(joueur_id)
+        return combat is not None and combat.status == "en_validation"
+
+    def selectionnes(self):
+        """Combats sélectionnés encore en attente ; vide la sélection"""
+        combats = [self._combat(j) for j in self.joueur_ids if j in self.selection and self._en_attente(j)]
+        self.selection.clear()
+        return combats
+
+    def rendu(self):
+        """Embed de la page courante ; met à jour le menu et les boutons en conséquence"""
+        # Les combats traités entre-temps (ici ou ailleurs) sortent de la file
+        self.joueur_ids = [j for j in self.joueur_ids if self._en_attente(j)]
+        self.selection &= set(self.joueur_ids)
+        nb_pages = max(1, math.ceil(len(self.joueur_ids) / PAGE_FILE))
+        self.page = min(self.page, nb_pages - 1)
+        debut = self.page * PAGE_FILE
+        combats = [self._combat(j) for j in self.joueur_ids[debut:debut + PAGE_FILE]]
 
-        del self.cog.combats_en_cours[self.joueur_id]
+        embed = discord.Embed(
+            title="📋 File de validation",
+            description=f"{len(self.joueur_ids)} combat(s) en attente · page {self.page + 1}/{nb_pages}",
+            color=0xF1C40F
+        )
+        options = []
+        for rang, combat in enumerate(combats, start=debut + 1):
+            date_str = datetime.fromtimestamp(combat.cree_le).strftime("%d/%m %H:%M")
+            coche = "☑️" if combat.joueur_id in self.selection else "▫️"
+            embed.add_field(
+                name=f"{coche} {rang}. Combat du {date_str}",
+                value=f"{', '.join(f'<@{j}>' for j in combat.joueurs)} · {combat.points} pts · {len(combat.screens)} screen(s)"
+                      + (f" · ⚠️ {len(combat.doublons)} déjà vu(s)" if combat.doublons else ""),
+                inline=False
+            )
+            options.append(discord.SelectOption(
+                label=f"{rang}. Combat du {date_str}",
+                value=str(combat.joueur_id),
+                description=f"{combat.points} pts × {len(combat.joueurs)} joueur(s)",
+                default=combat.joueur_id in self.selection
+            ))
+        embed.set_footer(text=f"{len(self.selection)} combat(s) sélectionné(s)")
+
+        # Un menu doit toujours avoir au moins une option
+        self.menu.options = options or [discord.SelectOption(label="File vide", value="0")]
+        self.menu.max_values = len(self.menu.options)
+        self.menu.disabled = not options
+        self.precedent.disabled = self.page == 0
+        self.suivant.disabled = self.page >= nb_pages - 1
+        self.valider.disabled = self.refuser.disabled = not self.selection
+        return embed
+
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.gray, row=1)
+    @mesurer("FileValidationView.precedent")
+    async def precedent(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await interaction.response.edit_message(embed=self.rendu(), view=self)
+
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.gray, row=1)
+    @mesurer("FileValidationView.suivant")
+    async def suivant(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await interaction.response.edit_message(embed=self.rendu(), view=self)
+
+    @discord.ui.button(label="✅ Valider la sélection", style=discord.ButtonStyle.green, row=2)
+    @mesurer("FileValidationView.valider")
+    async def valider(self, interaction: discord.Interaction, button: discord.ui.Button):
+        valides, ignores = await self.cog.valider_combats(self.selectionnes(), interaction.user.id)
+        await interaction.response.edit_message(embed=self.rendu(), view=self)
+
+        if valides:
+            self.cog.desactiver_validations(valides)
+            lignes = [
+                f"• Combat du {datetime.fromtimestamp(c.cree_le).strftime('%d/%m %H:%M')} : "
+                f"+{c.points} pts pour {', '.join(f'<@{j}>' for j in c.joueurs)}"
+                for c in valides
+            ]
+            await interaction.channel.send(
+                resume(f"✅ {len(valides)} combat(s) validé(s) par {interaction.user.mention} :", lignes)
+            )
+        if ignores:
+            await interaction.followup.send(
+                f"⚠️ {len(ignores)} combat(s) ignoré(s) : aucun leaderboard ouvert ne couvre leur date.",
+                ephemeral=True
+            )
+
+    @discord.ui.button(label="❌ Refuser la sélection", style=discord.ButtonStyle.red, row=2)
+    @mesurer("FileValidationView.refuser")
+    async def refuser(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(MotifRefusLotModal(self))
+
+
+class SelectionCombats(discord.ui.Select):
+    def __init__(self, file):
+        super().__init__(placeholder="Sélectionne les combats de la page...", min_values=0, row=0)
+        self.file = file
+
+    @mesurer("SelectionCombats.callback")
+    async def callback(self, interaction: discord.Interaction):
+        # Remplace la sélection de la page courante, garde celle des autres pages
+        self.file.selection -= {int(option.value) for option in self.options}
+        self.file.selection |= {int(valeur) for valeur in self.values}
+        await interaction.response.edit_message(embed=self.file.rendu(), view=self.file)
+
+
+class MotifRefusLotModal(discord.ui.Modal, title="Refus des combats sélectionnés"):
+    motif = discord.ui.TextInput(
+        label="Motif du refus",
+        style=discord.TextStyle.paragraph,
+        max_length=500
+    )
+
+    def __init__(self, file):
+        super().__init__(timeout=300)
+        self.file = file
+
+    @mesurer("MotifRefusLotModal.on_submit")
+    async def on_submit(self, interaction: discord.Interaction):
+        cog = self.file.cog
+        refuses = self.file.selectionnes()
+        for combat in refuses:
+            cog.terminer_combat(combat.cle)
+        await interaction.response.edit_message(embed=self.file.rendu(), view=self.file)
+
+        if refuses:
+            cog.desactiver_validations(refuses)
+            lignes = [
+                f"• Combat du {datetime.fromtimestamp(c.cree_le).strftime('%d/%m %H:%M')} publié par <@{c.joueurs[0]}>"
+                for c in refuses
+            ]
+            await interaction.channel.send(resume(
+                f"❌ {len(refuses)} combat(s) refusé(s) par {interaction.user.mention} pour motif suivant : {self.motif.value}",
+                lignes
+            ))
 
 
 # ---------------------------
 # Fonction pour charger le cog
 # ---------------------------
 async def setup(bot):
-    await bot.add_cog(CombatCog(bot))
\ No newline at end of file
+    await bot.add_cog(CombatCog(bot))
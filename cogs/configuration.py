@@ -0,0 +1,58 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+
+from utils.metriques import mesurer
+
+class ConfigurationCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        print(f"✅ Cog Configuration chargé et prêt ({len(self.bot.configs)} serveur(s) configuré(s))")
+
+    @app_commands.command(
+        name="configurer",
+        description="Rôles et salon du bot sur ce serveur (sans option : configuration actuelle)"
+    )
+    @app_commands.describe(
+        role_ladder="Rôle qui valide les combats",
+        role_lead="Rôle qui gère les leaderboards avec le ladder",
+        role_membres="Rôle mentionné à l'ouverture d'un purgatoire",
+        canal_leaderboard="Salon où publier les leaderboards"
+    )
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.guild_only()
+    @mesurer("configurer")
+    async def configurer(
+        self,
+        interaction: discord.Interaction,
+        role_ladder: discord.Role = None,
+        role_lead: discord.Role = None,
+        role_membres: discord.Role = None,
+        canal_leaderboard: discord.TextChannel = None
+    ):
+        champs = {}
+        if role_ladder is not None: champs["role_ladder_id"] = role_ladder.id
+        if role_lead is not None: champs["role_lead_id"] = role_lead.id
+        if role_membres is not None: champs["role_membres_id"] = role_membres.id
+        if canal_leaderboard is not None: champs["canal_leaderboard_id"] = canal_leaderboard.id
+
+        # Mise en cache immédiate : les vérifications suivantes voient déjà la nouvelle configuration
+        if champs:
+            config = self.bot.configs.modifier(interaction.guild_id, **champs)
+        else:
+            config = self.bot.configs.pour(interaction.guild_id)
+        await interaction.response.send_message(
+            ("✅ Configuration enregistrée :\n" if champs else "⚙️ Configuration actuelle :\n")
+            + f"🛡️ Ladder : <@&{config.role_ladder_id}>\n"
+            f"👑 Lead : <@&{config.role_lead_id}>\n"
+            f"👥 Membres : <@&{config.role_membres_id}>\n"
+            f"📊 Salon des leaderboards : <#{config.canal_leaderboard_id}>",
+            ephemeral=True
+        )
+
+
+# Fonction pour charger le cog
+async def setup(bot):
+    await bot.add_cog(ConfigurationCog(bot))
@@ -2,20 +2,198 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
+import asyncio
+import os
 
-# IDs à utiliser
-ROLE_LADDER_ID = 1459190410835660831
-ROLE_LEAD_ID = 1280235149191020625
-ROLE_MEMBRES_ID = 1280235478733422673
-CANAL_LEADERBOARD_ID = 1491009331762696344
+from utils import rendu
+from utils.classement import Classement
+from utils.intervalles import IndexIntervalles
+from utils.metriques import mesurer
+from utils.records import LeaderboardRecord
+from utils.redacteur import RedacteurFerme, RedacteurPoints
+
+SNAPSHOT_INTERVALLE = int(os.environ.get("LEDGER_SNAPSHOT_INTERVALLE", "200"))  # événements entre deux snapshots
 
 class LeaderboardCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.leaderboards = {}  # stocke tous les leaderboards en mémoire
+        self.leaderboards = {}  # leaderboard_id -> LeaderboardRecord, seulement les non clos
+        self._par_canal = {}  # channel_id -> [leaderboard_id] par ordre de création
+        self._par_periode = {}  # guild_id -> IndexIntervalles (debut, fin) -> leaderboard_id
+        self._canaux_orphelins = set()  # salons de leaderboards d'avant le multi-serveur, sans guild_id
+        self._depuis_snapshot = {}  # leaderboard_id -> événements journalisés depuis le dernier snapshot
+        self._redacteurs = {}  # leaderboard_id -> RedacteurPoints, seul à modifier le classement
 
     async def cog_load(self):
-        print("✅ Cog Leaderboard chargé et prêt")
+        # Le bouton des pages est routé par custom_id, quel que soit le leaderboard
+        self.bot.add_view(LeaderboardView(self))
+        self._vue = LeaderboardView(self)
+        self._vue.stop()  # instance de rendu seulement, hors ViewStore
+        # Recharge les leaderboards persistés ; seuls les ids sont gardés, aucun
+        # appel à l'API au démarrage
+        credites = self.bot.storage.combats_credites()
+        for lb_id, data in self.bot.storage.charger_leaderboards().items():
+            self._ajouter(LeaderboardRecord(lb_id, **data), credites.get(lb_id, ()))
+        # Ouvertures et clôtures manquées pendant un arrêt se déclenchent tout de suite
+        for leaderboard in self.leaderboards.values():
+            self._planifier_echeances(leaderboard)
+        self._depuis_snapshot = self.bot.storage.evenements_depuis_snapshot()
+        self._canaux_orphelins = self.bot.storage.canaux_sans_serveur()
+        print(f"✅ Cog Leaderboard chargé et prêt ({len(self.leaderboards)} leaderboard(s) restauré(s))")
+
+    def _ajouter(self, leaderboard, combats_credites=()):
+        """Enregistre un leaderboard en mémoire et dans les index"""
+        self.leaderboards[leaderboard.id] = leaderboard
+        self._redacteurs[leaderboard.id] = RedacteurPoints(
+            lambda commande: self._appliquer(leaderboard.id, commande),
+            lambda: self._rendre(leaderboard.id),
+            combats_credites,
+        )
+        self._par_canal.setdefault(leaderboard.channel_id, []).append(leaderboard.id)
+        self._par_periode.setdefault(leaderboard.guild_id, IndexIntervalles()).ajouter(
+            leaderboard.debut, leaderboard.fin, leaderboard.id
+        )
+
+    def _retirer(self, leaderboard_id):
+        """Sort un leaderboard de la mémoire et des index ; retourne son record, ou None"""
+        leaderboard = self.leaderboards.pop(leaderboard_id, None)
+        if leaderboard is None:
+            return None
+        self._par_canal[leaderboard.channel_id].remove(leaderboard_id)
+        if not self._par_canal[leaderboard.channel_id]:
+            del self._par_canal[leaderboard.channel_id]
+        periodes = self._par_periode[leaderboard.guild_id]
+        periodes.retirer(leaderboard_id)
+        if not periodes:
+            del self._par_periode[leaderboard.guild_id]
+        self._depuis_snapshot.pop(leaderboard_id, None)
+        self._redacteurs.pop(leaderboard_id, None)
+        return leaderboard
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild):
+        # Rattache les leaderboards d'avant le multi-serveur au serveur de leur salon
+        canaux = {channel_id for channel_id in self._canaux_orphelins if guild.get_channel(channel_id) is not None}
+        if not canaux:
+            return
+        self._canaux_orphelins -= canaux
+        self.bot.storage.rattacher_leaderboards(guild.id, canaux)
+        orphelins = [lb for lb in self.leaderboards.values() if lb.guild_id is None and lb.channel_id in canaux]
+        for leaderboard in orphelins:
+            self._par_periode[None].retirer(leaderboard.id)
+            if not self._par_periode[None]:
+                del self._par_periode[None]
+            leaderboard.guild_id = guild.id
+            self._par_periode.setdefault(guild.id, IndexIntervalles()).ajouter(
+                leaderboard.debut, leaderboard.fin, leaderboard.id
+            )
+        print(f"✅ Leaderboards de {len(canaux)} salon(s) rattachés au serveur {guild.name}")
+
+    def leaderboard_actif(self, guild_id, instant=None):
+        """Id du leaderboard du serveur dont la période couvre l'instant (maintenant par défaut), ou None"""
+        periodes = self._par_periode.get(guild_id)
+        return periodes.actif(instant or datetime.now()) if periodes is not None else None
+
+    def leaderboard_du_canal(self, channel_id):
+        """Id du dernier leaderboard publié dans le canal, ou None"""
+        ids = self._par_canal.get(channel_id)
+        return ids[-1] if ids else None
+
+    def soumettre(self, leaderboard_id, commande):
+        """Confie une CommandePoints au rédacteur du leaderboard ; retourne sa future.
+
+        Lève RedacteurFerme si le leaderboard est clos ou en cours de clôture.
+        """
+        redacteur = self._redacteurs.get(leaderboard_id)
+        if redacteur is None:
+            raise RedacteurFerme()
+        return redacteur.envoyer(commande)
+
+    def commandes_en_attente(self):
+        return sum(len(redacteur) for redacteur in self._redacteurs.values())
+
+    def _appliquer(self, leaderboard_id, commande):
+        """Exécutée par le rédacteur seul : aucune autre tâche ne touche au classement"""
+        classement = self.leaderboards[leaderboard_id].classement
+        resultat = {}
+        for joueur_id, delta in commande.variations.items():
+            ancien = classement.get(joueur_id, 0)
+            total = self.enregistrer_points(
+                leaderboard_id, joueur_id, delta, commande.motif, commande.auteur_id, commande.combat_id
+            )
+            resultat[joueur_id] = (ancien, total)
+        for joueur_id, total in commande.totaux.items():
+            # L'écart est calculé ici, sur le total à jour, jamais sur une lecture antérieure
+            ancien = classement.get(joueur_id, 0)
+            self.enregistrer_points(leaderboard_id, joueur_id, total - ancien, commande.motif, commande.auteur_id)
+            resultat[joueur_id] = (ancien, total)
+        return resultat
+
+    def enregistrer_points(self, leaderboard_id, joueur_id, delta, motif, auteur_id, combat_id=None):
+        """Applique une variation de points, la journalise dans le ledger et retourne le nouveau total.
+
+        `motif` vaut "combat" (validation) ou "manuel" (modification par le staff).
+        Réservée au rédacteur du leaderboard : passer par `soumettre`.
+        """
+        classement = self.leaderboards[leaderboard_id].classement
+        total = classement.ajouter(joueur_id, delta)
+        seq = self.bot.storage.ajouter_evenement(leaderboard_id, joueur_id, delta, motif, auteur_id, combat_id)
+        self.bot.storage.sauver_points(leaderboard_id, joueur_id, total)
+
+        # Snapshot périodique : un rejeu ne lit jamais plus d'un intervalle d'événements
+        compte = self._depuis_snapshot.get(leaderboard_id, 0) + 1
+        if compte >= SNAPSHOT_INTERVALLE:
+            self.bot.storage.sauver_snapshot(leaderboard_id, seq, dict(classement.items()))
+            compte = 0
+        self._depuis_snapshot[leaderboard_id] = compte
+        return total
+
+    # ---------------------------
+    # Ouverture et clôture planifiées
+    # ---------------------------
+    def _planifier_echeances(self, leaderboard):
+        echeancier = self.bot.echeancier
+        if leaderboard.debut > datetime.now():
+            echeancier.planifier(("ouverture", leaderboard.id), leaderboard.debut, self._ouvrir)
+        echeancier.planifier(("cloture", leaderboard.id), leaderboard.fin, self._clore)
+
+    def _ouvrir(self, cle):
+        # Le classement accepte déjà les combats de la période : on rafraîchit juste le statut
+        asyncio.create_task(self.update_leaderboard(cle[1]))
+
+    def _clore(self, cle):
+        asyncio.create_task(self.clore_leaderboard(cle[1]))
+
+    async def clore_leaderboard(self, leaderboard_id):
+        """Fige et publie le classement final, puis archive le leaderboard hors de la mémoire"""
+        redacteur = self._redacteurs.get(leaderboard_id)
+        if redacteur is not None:
+            # Les points déjà soumis comptent dans le classement final
+            await redacteur.fermer()
+        leaderboard = self._retirer(leaderboard_id)
+        if leaderboard is None:
+            return
+        # Retiré des index : plus aucune validation ni modification ne peut le toucher
+        self.bot.storage.archiver_leaderboard(leaderboard_id, dict(leaderboard.classement.items()))
+        # Un rendu remplace celui d'une mise à jour encore en attente
+        self.bot.edit_scheduler.schedule(
+            leaderboard.message(self.bot),
+            render=lambda: {"embed": rendu.embed_leaderboard(leaderboard, clos=True)},
+            view=LeaderboardView.figee(self)
+        )
+
+        medailles = ("🥇", "🥈", "🥉")
+        podium = "\n".join(
+            f"{medaille} <@{joueur_id}> : {points} pts"
+            for medaille, (joueur_id, points) in zip(medailles, leaderboard.classement.top(3))
+        )
+        try:
+            await self.bot.get_partial_messageable(leaderboard.channel_id).send(
+                f"🏁 Le purgatoire {leaderboard.cible} est terminé !\n{podium or 'Aucun point marqué.'}"
+            )
+        except discord.HTTPException as e:
+            print(f"⚠️ Annonce de clôture du leaderboard {leaderboard_id} impossible : {e}")
+        print(f"✅ Leaderboard {leaderboard.cible} clos et archivé")
 
     @app_commands.command(
         name="new",
@@ -28,6 +206,7 @@ class LeaderboardCog(commands.Cog):
         date_fin="Date de fin (JJ/MM/AAAA)",
         heure_fin="Heure de fin (HH:MM, 24h)"
     )
+    @mesurer("new")
     async def new(
         self,
         interaction: discord.Interaction,
@@ -38,8 +217,8 @@ class LeaderboardCog(commands.Cog):
         heure_fin: str
     ):
         # Vérification des rôles
-        roles_ids = [role.id for role in interaction.user.roles]
-        if ROLE_LADDER_ID not in roles_ids and ROLE_LEAD_ID not in roles_ids:
+        config = self.bot.configs.pour(interaction.guild_id)
+        if not config.est_gestionnaire(interaction.user):
             await interaction.response.send_message(
                 "❌ Tu n'as pas la permission de créer un leaderboard.", ephemeral=True
             )
@@ -71,8 +250,8 @@ class LeaderboardCog(commands.Cog):
         embed.add_field(name="🏆 Classement", value="*(vide pour l’instant)*", inline=False)
         embed.set_footer(text=f"Créé par {interaction.user.display_name}")
 
-        # Envoyer dans le canal prévu
-        canal = self.bot.get_channel(CANAL_LEADERBOARD_ID)
+        # Envoyer dans le canal prévu, cherché dans ce serveur seulement
+        canal = interaction.guild.get_channel(config.canal_leaderboard_id)
         if canal is None:
             await interaction.response.send_message(
                 "❌ Impossible de trouver le canal du leaderboard.", ephemeral=True
@@ -80,50 +259,175 @@ class LeaderboardCog(commands.Cog):
             return
 
         msg = await canal.send(
-            content=f"<@&{ROLE_MEMBRES_ID}> nouveau purgatoire ouvert ! ⏳",
-            embed=embed
+            content=f"<@&{config.role_membres_id}> nouveau purgatoire ouvert ! ⏳",
+            embed=embed,
+            view=self._vue
         )
 
         # Stocker en mémoire
-        self.leaderboards[msg.id] = {
-            "cible": cible,
-            "debut": debut_dt,
-            "fin": fin_dt,
-            "message": msg,
-            "classement": {},  # clé: joueur.id, valeur: points
-        }
+        leaderboard = LeaderboardRecord(msg.id, cible, debut_dt, fin_dt, canal.id, interaction.guild_id)
+        self._ajouter(leaderboard)
+        self._planifier_echeances(leaderboard)
+        self.bot.storage.sauver_leaderboard(msg.id, cible, debut_dt, fin_dt, canal.id, interaction.guild_id)
 
         await interaction.response.send_message(
             f"✅ Leaderboard créé avec succès dans {canal.mention}", ephemeral=True
         )
 
-    async def update_leaderboard(self, leaderboard_id):
-        """Met à jour l'embed d'un leaderboard existant avec le classement actuel"""
-        if leaderboard_id not in self.leaderboards:
+    @app_commands.command(
+        name="mon_rang",
+        description="Voir ta position dans le leaderboard en cours"
+    )
+    @mesurer("mon_rang")
+    async def mon_rang(self, interaction: discord.Interaction):
+        leaderboard_id = self.leaderboard_actif(interaction.guild_id)
+        if leaderboard_id is None:
+            await interaction.response.send_message("❌ Aucun leaderboard en cours.", ephemeral=True)
             return
 
         leaderboard = self.leaderboards[leaderboard_id]
-        classement = leaderboard["classement"]
+        classement = leaderboard.classement
+        rang = classement.rang(interaction.user.id)
+        if rang is None:
+            await interaction.response.send_message(
+                f"❌ Tu n'as pas encore de points sur le purgatoire {leaderboard.cible}.", ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(
+            f"🏆 Tu es **{rang}e** sur {len(classement)} avec {classement[interaction.user.id]} pts "
+            f"(purgatoire {leaderboard.cible}).",
+            ephemeral=True
+        )
+
+    @app_commands.command(
+        name="classement_au",
+        description="Voir le classement tel qu'il était à une date donnée"
+    )
+    @app_commands.describe(
+        date="Date (JJ/MM/AAAA)",
+        heure="Heure (HH:MM, 24h)"
+    )
+    @mesurer("classement_au")
+    async def classement_au(self, interaction: discord.Interaction, date: str, heure: str):
+        try:
+            instant = datetime.strptime(f"{date} {heure}", "%d/%m/%Y %H:%M")
+        except ValueError:
+            await interaction.response.send_message(
+                "❌ Format invalide. Date JJ/MM/AAAA et heure HH:MM.", ephemeral=True
+            )
+            return
 
-        # Construire la liste de classement triée par points décroissants
+        leaderboard_id = self.leaderboard_actif(interaction.guild_id, instant)
+        if leaderboard_id is not None:
+            cible = self.leaderboards[leaderboard_id].cible
+        else:
+            # Les leaderboards clos ne sont plus en mémoire mais restent rejouables
+            archive = self.bot.storage.leaderboard_archive(interaction.guild_id, instant)
+            if archive is None:
+                await interaction.response.send_message("❌ Aucun leaderboard n'était ouvert à cette date.", ephemeral=True)
+                return
+            leaderboard_id, cible = archive
+
+        classement = Classement(await self.bot.storage.rejouer(leaderboard_id, instant.timestamp()))
         if classement:
-            sorted_classement = sorted(classement.items(), key=lambda x: x[1], reverse=True)
-            classement_text = "\n".join(f"<@{joueur_id}> : {points} pts" for joueur_id, points in sorted_classement)
+            lignes = "\n".join(
+                f"{rang}. <@{joueur_id}> : {points} pts"
+                for rang, (joueur_id, points) in enumerate(classement.top(10), start=1)
+            )
         else:
-            classement_text = "*(vide pour l’instant)*"
+            lignes = "*(vide à cette date)*"
+        await interaction.response.send_message(
+            f"🕰️ Classement du purgatoire {cible} au {instant.strftime('%d/%m/%Y %H:%M')} :\n{lignes}",
+            ephemeral=True
+        )
 
-        embed = discord.Embed(
-            title="📊 Leaderboard purgatoire",
-            description=f"🎯 **Cible :** {leaderboard['cible']}",
-            color=0x5865F2
+    async def update_leaderboard(self, leaderboard_id):
+        """Met à jour l'embed d'un leaderboard existant avec le classement actuel"""
+        self._rendre(leaderboard_id)
+
+    def _rendre(self, leaderboard_id):
+        leaderboard = self.leaderboards.get(leaderboard_id)
+        if leaderboard is None:
+            return
+        # Rendu au moment de l'envoi, et seulement si le classement a changé depuis le dernier ;
+        # la vue est renvoyée pour équiper aussi les messages publiés avant le bouton des pages
+        self.bot.edit_scheduler.schedule(
+            leaderboard.message(self.bot), render=lambda: {"embed": rendu.embed_leaderboard(leaderboard)}, view=self._vue
         )
-        embed.add_field(name="Début :", value=leaderboard['debut'].strftime("%d/%m/%Y %H:%M"), inline=False)
-        embed.add_field(name="Fin :", value=leaderboard['fin'].strftime("%d/%m/%Y %H:%M"), inline=False)
-        embed.add_field(name="🏆 Classement", value=classement_text, inline=False)
-        embed.set_footer(text="Mise à jour automatique")
 
-        await leaderboard["message"].edit(embed=embed)
 
+# ---------------------------
+# Bouton du message public (persistant)
+# ---------------------------
+class LeaderboardView(discord.ui.View):
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @classmethod
+    def figee(cls, cog):
+        """Bouton désactivé, pour un leaderboard clos"""
+        view = cls(cog)
+        view.pages.disabled = True
+        view.stop()
+        return view
+
+    @discord.ui.button(label="📜 Classement complet", style=discord.ButtonStyle.gray, custom_id="leaderboard:pages")
+    @mesurer("LeaderboardView.pages")
+    async def pages(self, interaction: discord.Interaction, button: discord.ui.Button):
+        leaderboard = self.cog.leaderboards.get(interaction.message.id)
+        if leaderboard is None:
+            await interaction.response.send_message(
+                "❌ Ce leaderboard est clos : utilise /classement_au pour le consulter.", ephemeral=True
+            )
+            self.cog.bot.edit_scheduler.schedule(interaction.message, view=LeaderboardView.figee(self.cog))
+            return
+        # Chaque membre navigue dans sa propre copie éphémère, ouverte sur sa page
+        view = PagesLeaderboardView(self.cog, leaderboard.id, leaderboard.pages.page_du_joueur(interaction.user.id))
+        await interaction.response.send_message(embed=view.rendu(), view=view, ephemeral=True)
+
+
+# ---------------------------
+# Navigation éphémère dans les pages
+# ---------------------------
+class PagesLeaderboardView(discord.ui.View):
+    def __init__(self, cog, leaderboard_id, page=0):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.leaderboard_id = leaderboard_id
+        self.page = page
+
+    def rendu(self):
+        """Embed de la page courante ; None si le leaderboard a été clos entre-temps"""
+        leaderboard = self.cog.leaderboards.get(self.leaderboard_id)
+        if leaderboard is None:
+            return None
+        # Le classement a pu rétrécir depuis l'ouverture
+        self.page = max(0, min(self.page, len(leaderboard.pages) - 1))
+        self.precedent.disabled = self.page == 0
+        self.suivant.disabled = self.page >= len(leaderboard.pages) - 1
+        return rendu.embed_page_classement(leaderboard, self.page)
+
+    async def _afficher(self, interaction: discord.Interaction):
+        embed = self.rendu()
+        if embed is None:
+            self.stop()
+            await interaction.response.edit_message(content="🏁 Ce leaderboard est clos.", embed=None, view=None)
+            return
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.gray)
+    @mesurer("PagesLeaderboardView.precedent")
+    async def precedent(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page -= 1
+        await self._afficher(interaction)
+
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.gray)
+    @mesurer("PagesLeaderboardView.suivant")
+    async def suivant(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page += 1
+        await self._afficher(interaction)
 
 # Fonction pour charger le cog
 async def setup(bot):
@@ -3,9 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 from datetime import datetime
 
-# IDs des rôles
-ROLE_LADDER_ID = 1459190410835660831
-ROLE_LEAD_ID = 1280235149191020625
+from utils.metriques import mesurer
+from utils.redacteur import CommandePoints, RedacteurFerme
 
 class LeaderboardEditCog(commands.Cog):
     def __init__(self, bot):
@@ -22,6 +21,7 @@ class LeaderboardEditCog(commands.Cog):
         joueur="Le joueur dont tu veux modifier les points",
         nouveau_total="Nouveau total de points à mettre"
     )
+    @mesurer("modifier_joueur")
     async def modifier_joueur(
         self,
         interaction: discord.Interaction,
@@ -29,8 +29,7 @@ class LeaderboardEditCog(commands.Cog):
         nouveau_total: int
     ):
         # Vérifier rôle
-        roles_ids = [role.id for role in interaction.user.roles]
-        if ROLE_LADDER_ID not in roles_ids and ROLE_LEAD_ID not in roles_ids:
+        if not self.bot.configs.pour(interaction.guild_id).est_gestionnaire(interaction.user):
             await interaction.response.send_message(
                 "❌ Tu n’as pas la permission de modifier le leaderboard.", ephemeral=True
             )
@@ -45,35 +44,30 @@ class LeaderboardEditCog(commands.Cog):
             return
 
         # Cherche le leaderboard dans ce canal
-        leaderboard = None
-        for lb in leaderboard_cog.leaderboards.values():
-            if lb["message"].channel.id == interaction.channel.id:
-                leaderboard = lb
-                break
-
-        if leaderboard is None:
+        leaderboard_id = leaderboard_cog.leaderboard_du_canal(interaction.channel.id)
+        if leaderboard_id is None:
             await interaction.response.send_message(
                 "❌ Aucun leaderboard trouvé dans ce canal.", ephemeral=True
             )
             return
 
-        ancien_total = leaderboard["classement"].get(joueur.id, 0)
-        leaderboard["classement"][joueur.id] = nouveau_total
+        # Journalisé comme une variation calculée par le rédacteur sur le total à jour :
+        # l'ancien total reste dans le ledger et l'embed est rendu avec le lot
+        try:
+            resultat = await leaderboard_cog.soumettre(
+                leaderboard_id, CommandePoints("manuel", interaction.user.id, totaux={joueur.id: nouveau_total})
+            )
+        except RedacteurFerme:
+            await interaction.response.send_message(
+                "❌ Ce leaderboard vient d’être clos : modification impossible.", ephemeral=True
+            )
+            return
+        ancien_total = resultat[joueur.id][0]
 
-        # Mettre à jour l'embed du leaderboard
-        embed = leaderboard["message"].embeds[0]
-        classement_lines = []
-        for member_id, points in leaderboard["classement"].items():
-            member = interaction.guild.get_member(member_id)
-            if member:
-                classement_lines.append(f"{member.display_name} : {points} pts")
-        embed.set_field_at(
-            2,
-            name="🏆 Classement",
-            value="\n".join(classement_lines) if classement_lines else "*(vide pour l’instant)*",
-            inline=False
+        # Acquitter d'abord : le message public peut attendre son bucket
+        await interaction.response.send_message(
+            "✅ Modification effectuée.", ephemeral=True
         )
-        await leaderboard["message"].edit(embed=embed)
 
         # Message public de suivi
         now_str = datetime.now().strftime("%d/%m/%Y %H:%M")
@@ -81,8 +75,45 @@ class LeaderboardEditCog(commands.Cog):
             f"Total points du joueur {joueur.mention} modifié par {interaction.user.mention} : {ancien_total} pts -> {nouveau_total} pts. {now_str}"
         )
 
+    @app_commands.command(
+        name="historique",
+        description="Voir les dernières variations de points d’un joueur dans le leaderboard du canal"
+    )
+    @app_commands.describe(joueur="Le joueur dont tu veux voir l’historique")
+    @mesurer("historique")
+    async def historique(self, interaction: discord.Interaction, joueur: discord.Member):
+        if not self.bot.configs.pour(interaction.guild_id).est_gestionnaire(interaction.user):
+            await interaction.response.send_message(
+                "❌ Tu n’as pas la permission de consulter l’historique.", ephemeral=True
+            )
+            return
+
+        leaderboard_cog = self.bot.get_cog("LeaderboardCog")
+        leaderboard_id = leaderboard_cog.leaderboard_du_canal(interaction.channel.id) if leaderboard_cog else None
+        if leaderboard_id is None:
+            await interaction.response.send_message(
+                "❌ Aucun leaderboard trouvé dans ce canal.", ephemeral=True
+            )
+            return
+
+        evenements = await self.bot.storage.historique(leaderboard_id, joueur.id)
+        if not evenements:
+            await interaction.response.send_message(
+                f"❌ Aucune variation de points pour {joueur.mention}.", ephemeral=True
+            )
+            return
+
+        lignes = []
+        for delta, motif, auteur_id, combat_id, horodatage in evenements:
+            date_str = datetime.fromtimestamp(horodatage).strftime("%d/%m/%Y %H:%M")
+            if motif == "combat":
+                lignes.append(f"⚔️ {date_str} : {delta:+} pts, combat validé par <@{auteur_id}>")
+            else:
+                lignes.append(f"✏️ {date_str} : {delta:+} pts, modification par <@{auteur_id}>")
         await interaction.response.send_message(
-            "✅ Modification effectuée.", ephemeral=True
+            f"📜 Historique de {joueur.mention} (total actuel : "
+            f"{leaderboard_cog.leaderboards[leaderboard_id].classement.get(joueur.id, 0)} pts) :\n" + "\n".join(lignes),
+            ephemeral=True
         )
 
 
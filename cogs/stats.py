@@ -0,0 +1,79 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+import io
+
+from utils import rendu
+from utils.metriques import mesurer
+
+class StatsCog(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def cog_load(self):
+        print(f"✅ Cog Stats chargé et prêt ({len(self.bot.stats)} participation(s) en historique)")
+
+    async def _indisponible(self, interaction: discord.Interaction):
+        """Répond et retourne True si les agrégats ne peuvent pas être calculés"""
+        if not self.bot.stats.actif:
+            await interaction.response.send_message(
+                "❌ Statistiques indisponibles : NumPy n'est pas installé sur le bot.", ephemeral=True
+            )
+            return True
+        return False
+
+    @app_commands.command(
+        name="stats",
+        description="Statistiques des combats validés, tous purgatoires confondus"
+    )
+    @app_commands.describe(joueur="Joueur à détailler (sinon : tout le serveur)")
+    @app_commands.guild_only()
+    @mesurer("stats")
+    async def stats(self, interaction: discord.Interaction, joueur: discord.Member = None):
+        if await self._indisponible(interaction):
+            return
+
+        # Agrégats mémorisés : recalculés seulement après une nouvelle validation sur ce serveur
+        stats = self.bot.stats
+        if joueur is None:
+            agregat = stats.par_joueur(interaction.guild_id)
+            if not len(agregat["joueur"]):
+                await interaction.response.send_message("❌ Aucun combat validé sur ce serveur.", ephemeral=True)
+                return
+            embed = rendu.embed_stats_serveur(agregat, stats.par_semaine(interaction.guild_id))
+        else:
+            ligne = stats.joueur(interaction.guild_id, joueur.id)
+            if ligne is None:
+                await interaction.response.send_message(
+                    f"❌ Aucun combat validé pour {joueur.mention}.", ephemeral=True
+                )
+                return
+            embed = rendu.embed_stats_joueur(joueur.id, ligne, stats.par_semaine(interaction.guild_id, joueur.id))
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @app_commands.command(
+        name="stats_export",
+        description="Exporter les statistiques par joueur du serveur en CSV"
+    )
+    @app_commands.guild_only()
+    @mesurer("stats_export")
+    async def stats_export(self, interaction: discord.Interaction):
+        if not self.bot.configs.pour(interaction.guild_id).est_gestionnaire(interaction.user):
+            await interaction.response.send_message(
+                "❌ Tu n'as pas la permission d'exporter les statistiques.", ephemeral=True
+            )
+            return
+        if await self._indisponible(interaction):
+            return
+
+        contenu = self.bot.stats.exporter_csv(interaction.guild_id)
+        await interaction.response.send_message(
+            "📤 Statistiques par joueur, tous purgatoires confondus :",
+            file=discord.File(io.BytesIO(contenu), filename=f"stats_{interaction.guild_id}.csv"),
+            ephemeral=True
+        )
+
+
+# Fonction pour charger le cog
+async def setup(bot):
+    await bot.add_cog(StatsCog(bot))
@@ -1,50 +1,146 @@
-from flask import Flask
-import threading
 import discord
 from discord.ext import commands
 import os
+import time
+from contextlib import contextmanager
 
-# ---------------------------
-# Flask pour Render
-# ---------------------------
-app = Flask(__name__)
-
-@app.route("/")
-def home():
-    return "Bot Discord actif ✅"
-
-def run_flask():
-    app.run(host="0.0.0.0", port=8080)
+from utils.commandes import empreinte_commandes
+from utils.config import ConfigurationServeurs
+from utils.echeancier import Echeancier
+from utils.edit_scheduler import EditScheduler
+from utils.metriques import instrumenter_gateway, instrumenter_http
+from utils.screens import IngestionScreens
+from utils.serveur import ServeurHTTP
+from utils.sortie import FileSortante
+from utils.stats import StatsCombats
+from utils.storage import Storage
+from utils.timer_wheel import TimerWheel
 
 # ---------------------------
 # Discord Bot
 # ---------------------------
-intents = discord.Intents.default()
-intents.members = True
-intents.message_content = True
+# Tout passe par les interactions (options, pièces jointes, modals) : seuls les
+# salons et rôles des serveurs sont utiles, aucun intent privilégié
+intents = discord.Intents.none()
+intents.guilds = True
+
+# Serveur de test : les commandes y sont synchronisées instantanément au lieu du sync global
+SYNC_GUILD_ID = os.environ.get("BST_SYNC_GUILD_ID")
+FORCE_SYNC = os.environ.get("BST_FORCE_SYNC") == "1"
+# Compte événements et octets reçus de la gateway (/metrics), pour comparer deux configurations
+MESURE_GATEWAY = os.environ.get("BST_MESURE_GATEWAY") == "1"
 
-class MyBot(commands.Bot):
+@contextmanager
+def phase(nom):
+    debut = time.perf_counter()
+    yield
+    print(f"⏱️ {nom} : {(time.perf_counter() - debut) * 1000:.0f} ms")
+
+# Plusieurs serveurs d'alliance : discord.py choisit le nombre de shards et les connecte tous
+class MyBot(commands.AutoShardedBot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            # Ni membres ni messages en cache : les interactions portent déjà ce qu'il faut
+            member_cache_flags=discord.MemberCacheFlags.none(),
+            max_messages=None,
+            chunk_guilds_at_startup=False,
+            enable_debug_events=MESURE_GATEWAY,
+        )
 
     async def setup_hook(self):
+        # File sortante par priorité, puis mesures : la durée d'un appel inclut son attente de jeton
+        self.file_sortante = FileSortante()
+        self.file_sortante.installer(self)
+        # Compte et chronomètre chaque appel REST vers Discord
+        instrumenter_http(self)
+        if MESURE_GATEWAY:
+            instrumenter_gateway(self)
+        with phase("Base de données"):
+            # Base de données partagée par les cogs, chargée avant eux
+            self.storage = Storage()
+            self.storage.start()
+            # Rôles et salon de chaque serveur, gardés en mémoire
+            self.configs = ConfigurationServeurs(self.storage)
+            self.configs.charger()
+        with phase("Index des screens"):
+            # Empreintes des screens déjà soumis, pour signaler les doublons
+            self.screens = IngestionScreens(self.storage)
+            self.screens.charger()
+            await self.screens.start()
+        if not self.screens.actif:
+            print("⚠️ Pillow absent : détection des screens en double désactivée")
+        with phase("Historique des stats"):
+            # Combats validés de tous les purgatoires, en colonnes pour /stats
+            self.stats = StatsCombats(self.storage)
+            self.stats.charger()
+        if not self.stats.actif:
+            print("⚠️ NumPy absent : combats enregistrés mais /stats désactivé")
+        # Tous les edits de messages récurrents passent par le planificateur
+        self.edit_scheduler = EditScheduler()
+        # Échéances (expiration des combats, etc.) sur une roue temporelle unique
+        self.timer_wheel = TimerWheel()
+        self.timer_wheel.start()
+        # Dates de début et de fin des leaderboards sur un tas d'échéances
+        self.echeancier = Echeancier()
+        self.echeancier.start()
+        # Keep-alive Render, santé et métriques, sur la boucle du bot
+        self.serveur_http = ServeurHTTP(self)
+        await self.serveur_http.start()
         # Charger les cogs avant la connexion, **un par un**
-        await self.load_extension("cogs.combat")
-        await self.load_extension("cogs.leaderboard")
-        await self.load_extension("cogs.leaderboard_edit")
-        # Synchronisation globale des commandes slash
-        await self.tree.sync()
-        print("✅ Cogs chargés et commandes slash synchronisées")
+        for extension in ("cogs.configuration", "cogs.combat", "cogs.leaderboard", "cogs.leaderboard_edit", "cogs.stats"):
+            with phase(f"Chargement {extension}"):
+                await self.load_extension(extension)
+        with phase("Synchronisation des commandes"):
+            await self.synchroniser_commandes()
+        print("✅ Cogs chargés et commandes slash à jour")
+
+    async def synchroniser_commandes(self):
+        """Synchronise les commandes slash seulement si l'arbre a changé depuis le dernier sync"""
+        guild = discord.Object(id=int(SYNC_GUILD_ID)) if SYNC_GUILD_ID else None
+        if guild is not None:
+            self.tree.copy_global_to(guild=guild)
+        cle = f"commandes:{guild.id if guild else 'global'}"
+        empreinte = empreinte_commandes(self.tree, guild=guild)
+        if not FORCE_SYNC and self.storage.lire_meta(cle) == empreinte:
+            print("✅ Commandes slash inchangées, pas de synchronisation")
+            return
+        await self.tree.sync(guild=guild)
+        # Enregistrée seulement après un sync réussi
+        self.storage.ecrire_meta(cle, empreinte)
+        print(f"✅ Commandes slash synchronisées ({'serveur ' + SYNC_GUILD_ID if guild else 'global'})")
+
+    async def close(self):
+        await super().close()
+        if hasattr(self, "serveur_http"):
+            await self.serveur_http.close()
+        if hasattr(self, "edit_scheduler"):
+            self.edit_scheduler.close()
+        if hasattr(self, "screens"):
+            await self.screens.close()
+        if hasattr(self, "file_sortante"):
+            self.file_sortante.close()
+        if hasattr(self, "timer_wheel"):
+            self.timer_wheel.close()
+        if hasattr(self, "echeancier"):
+            self.echeancier.close()
+        # Vide la file d'écriture avant de quitter
+        if hasattr(self, "storage"):
+            await self.storage.close()
 
 bot = MyBot()
 
+@bot.event
+async def on_shard_ready(shard_id):
+    print(f"✅ Shard {shard_id} connecté")
+
 @bot.event
 async def on_ready():
-    print(f"Bot connecté en tant que {bot.user}")
+    print(f"Bot connecté en tant que {bot.user} ({bot.shard_count} shard(s), {len(bot.guilds)} serveur(s))")
 
 # ---------------------------
-# Lancement Flask + Discord
+# Lancement
 # ---------------------------
 if __name__ == "__main__":
-    threading.Thread(target=run_flask).start()
     bot.run(os.environ["DISCORD_TOKEN"])
\ No newline at end of file
@@ -0,0 +1 @@
+# utils/ : briques partagées entre les cogs (persistance, etc.)
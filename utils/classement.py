@@ -0,0 +1,148 @@
+# utils/classement.py
+
+import math
+from bisect import bisect_left
+from collections import deque
+
+JOURNAL_MAX = 256  # changements de positions mémorisés pour l'invalidation des pages
+TAILLE_PAGE = 20  # lignes par page : reste sous la limite de 1024 caractères d'un champ d'embed
+
+
+class Classement:
+    """Classement d'un leaderboard maintenu trié à chaque changement de points.
+
+    S'utilise comme un dict {joueur_id: points} et garde en parallèle une liste
+    triée de clés (-points, joueur_id) : la recherche d'une position se fait
+    par bisection, le top-N est une simple tranche et le rang d'un joueur ne
+    demande aucun tri.
+    """
+
+    __slots__ = ("_points", "_ordre", "version", "_journal")
+
+    def __init__(self, points=None):
+        self._points = dict(points or {})
+        self._ordre = sorted((-pts, joueur_id) for joueur_id, pts in self._points.items())
+        self.version = 0
+        self._journal = deque(maxlen=JOURNAL_MAX)  # (version, premier index touché, dernier index touché)
+
+    # ----- Accès façon dict -----
+    def __len__(self):
+        return len(self._points)
+
+    def __contains__(self, joueur_id):
+        return joueur_id in self._points
+
+    def __getitem__(self, joueur_id):
+        return self._points[joueur_id]
+
+    def get(self, joueur_id, defaut=None):
+        return self._points.get(joueur_id, defaut)
+
+    def items(self):
+        return self._points.items()
+
+    def __setitem__(self, joueur_id, points):
+        ancien = self._points.get(joueur_id)
+        if ancien is not None:
+            if ancien == points:
+                return
+            index_ancien = bisect_left(self._ordre, (-ancien, joueur_id))
+            del self._ordre[index_ancien]
+        self._points[joueur_id] = points
+        cle = (-points, joueur_id)
+        index = bisect_left(self._ordre, cle)
+        self._ordre.insert(index, cle)
+
+        # Seules les positions entre l'ancienne et la nouvelle place bougent ;
+        # un nouveau joueur décale toute la suite du classement
+        if ancien is None:
+            touches = (index, len(self._ordre) - 1)
+        else:
+            touches = (min(index, index_ancien), max(index, index_ancien))
+        self.version += 1
+        self._journal.append((self.version, *touches))
+
+    def ajouter(self, joueur_id, points):
+        """Ajoute des points à un joueur et retourne son nouveau total"""
+        total = self._points.get(joueur_id, 0) + points
+        self[joueur_id] = total
+        return total
+
+    # ----- Requêtes de classement -----
+    def trie(self):
+        """Itère sur (joueur_id, points) par points décroissants"""
+        return ((joueur_id, -neg) for neg, joueur_id in self._ordre)
+
+    def top(self, n, debut=0):
+        """Retourne la tranche [debut, debut + n) du classement"""
+        return [(joueur_id, -neg) for neg, joueur_id in self._ordre[debut:debut + n]]
+
+    def position(self, joueur_id):
+        """Index (0 = premier) du joueur dans l'ordre du classement, ou None"""
+        points = self._points.get(joueur_id)
+        if points is None:
+            return None
+        return bisect_left(self._ordre, (-points, joueur_id))
+
+    def modifications_depuis(self, version):
+        """Plages d'index (debut, fin) modifiées depuis `version`, ou None si le
+        journal ne remonte pas jusque-là"""
+        if version == self.version:
+            return []
+        if not self._journal or self._journal[0][0] > version + 1:
+            return None
+        return [(debut, fin) for v, debut, fin in self._journal if v > version]
+
+    def rang(self, joueur_id):
+        """Rang (1 = premier, ex aequo au même rang) du joueur, ou None s'il n'est pas classé"""
+        points = self._points.get(joueur_id)
+        if points is None:
+            return None
+        # Nombre de joueurs ayant strictement plus de points, + 1
+        return bisect_left(self._ordre, (-points,)) + 1
+
+
+class PagesClassement:
+    """Pages de texte d'un classement, formatées à la demande et gardées en cache.
+
+    Naviguer entre les pages ne retrie ni ne reformate rien ; un changement de
+    points n'invalide que les pages couvrant les positions qui ont bougé.
+    """
+
+    __slots__ = ("classement", "taille", "_pages", "_version")
+
+    def __init__(self, classement, taille=TAILLE_PAGE):
+        self.classement = classement
+        self.taille = taille
+        self._pages = {}  # numéro -> texte
+        self._version = classement.version
+
+    def __len__(self):
+        return max(1, math.ceil(len(self.classement) / self.taille))
+
+    def _synchroniser(self):
+        modifications = self.classement.modifications_depuis(self._version)
+        if modifications is None:
+            self._pages.clear()
+        else:
+            for debut, fin in modifications:
+                for numero in range(debut // self.taille, fin // self.taille + 1):
+                    self._pages.pop(numero, None)
+        self._version = self.classement.version
+
+    def page_du_joueur(self, joueur_id):
+        """Numéro de la page où figure le joueur (0 s'il n'est pas classé)"""
+        position = self.classement.position(joueur_id)
+        return 0 if position is None else position // self.taille
+
+    def page(self, numero):
+        """Texte de la page `numero` (0 = premières places), vide au-delà de la dernière"""
+        self._synchroniser()
+        texte = self._pages.get(numero)
+        if texte is None:
+            debut = numero * self.taille
+            texte = self._pages[numero] = "\n".join(
+                f"{rang}. <@{joueur_id}> : {points} pts"
+                for rang, (joueur_id, points) in enumerate(self.classement.top(self.taille, debut), start=debut + 1)
+            )
+        return texte
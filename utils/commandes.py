@@ -0,0 +1,26 @@
+# utils/commandes.py
+
+import hashlib
+import json
+
+
+def _payload(commande, tree):
+    # discord.py >= 2.4 demande l'arbre pour sérialiser une commande
+    try:
+        return commande.to_dict(tree)
+    except TypeError:
+        return commande.to_dict()
+
+
+def empreinte_commandes(tree, guild=None):
+    """Hash stable de l'arbre de commandes tel qu'il serait envoyé à Discord.
+
+    Couvre noms, descriptions, options et permissions ; l'ordre d'enregistrement
+    des commandes n'influe pas sur le résultat.
+    """
+    payloads = sorted(
+        (_payload(commande, tree) for commande in tree.get_commands(guild=guild)),
+        key=lambda p: (p.get("type", 1), p["name"]),
+    )
+    brut = json.dumps(payloads, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(brut.encode()).hexdigest()
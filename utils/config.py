@@ -0,0 +1,78 @@
+# utils/config.py
+
+import discord
+
+# Serveur d'origine : valeurs reprises pour tout serveur sans configuration enregistrée
+ROLE_LADDER_ID = 1459190410835660831
+ROLE_LEAD_ID = 1280235149191020625
+ROLE_MEMBRES_ID = 1280235478733422673
+CANAL_LEADERBOARD_ID = 1491009331762696344
+
+
+class ConfigServeur:
+    """Rôles et salon d'un serveur ; les vérifications de rôle sont des recherches dans un frozenset"""
+
+    __slots__ = ("role_ladder_id", "role_lead_id", "role_membres_id", "canal_leaderboard_id", "validateurs", "gestionnaires")
+
+    def __init__(self, role_ladder_id, role_lead_id, role_membres_id, canal_leaderboard_id):
+        self.role_ladder_id = role_ladder_id
+        self.role_lead_id = role_lead_id
+        self.role_membres_id = role_membres_id
+        self.canal_leaderboard_id = canal_leaderboard_id
+        self.validateurs = frozenset({role_ladder_id})  # valident et refusent les combats
+        self.gestionnaires = frozenset({role_ladder_id, role_lead_id})  # créent et corrigent les leaderboards
+
+    def to_dict(self):
+        return {
+            "role_ladder_id": self.role_ladder_id,
+            "role_lead_id": self.role_lead_id,
+            "role_membres_id": self.role_membres_id,
+            "canal_leaderboard_id": self.canal_leaderboard_id,
+        }
+
+    def remplacer(self, **champs):
+        return ConfigServeur(**{**self.to_dict(), **champs})
+
+    @staticmethod
+    def a_un_role(membre, roles):
+        """Vrai si le membre porte l'un des rôles ; faux hors serveur (message privé)"""
+        if not isinstance(membre, discord.Member):
+            return False
+        return any(membre.get_role(role_id) is not None for role_id in roles)
+
+    def est_validateur(self, membre):
+        return self.a_un_role(membre, self.validateurs)
+
+    def est_gestionnaire(self, membre):
+        return self.a_un_role(membre, self.gestionnaires)
+
+
+DEFAUT = ConfigServeur(ROLE_LADDER_ID, ROLE_LEAD_ID, ROLE_MEMBRES_ID, CANAL_LEADERBOARD_ID)
+
+
+class ConfigurationServeurs:
+    """Configuration de chaque serveur, lue une fois en base puis servie depuis la mémoire.
+
+    Une modification est écrite tout de suite et remplace l'entrée en cache :
+    aucune vérification de permission ne touche la base.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+        self._configs = {}  # guild_id -> ConfigServeur
+
+    def __len__(self):
+        return len(self._configs)
+
+    def charger(self):
+        self._configs = {guild_id: ConfigServeur(**data) for guild_id, data in self.storage.charger_configs().items()}
+
+    def pour(self, guild_id):
+        """Configuration du serveur, celle du serveur d'origine s'il n'en a pas"""
+        return self._configs.get(guild_id, DEFAUT)
+
+    def modifier(self, guild_id, **champs):
+        config = self.pour(guild_id).remplacer(**champs)
+        self.storage.sauver_config(guild_id, config.to_dict())
+        self._configs[guild_id] = config
+        return config
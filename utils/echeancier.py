@@ -0,0 +1,78 @@
+# utils/echeancier.py
+
+import asyncio
+import heapq
+import itertools
+import time
+
+ATTENTE_MAX = 300  # secondes : on se recale régulièrement sur l'horloge murale
+
+
+class Echeancier:
+    """Échéances datées (ouverture, clôture...) sur un tas binaire.
+
+    Complète la roue temporelle pour les échéances lointaines et peu nombreuses :
+    une seule tâche dort jusqu'à la plus proche, sans scruter chaque objet.
+    Replanifier ou annuler une clé invalide son entrée, qui est simplement
+    ignorée quand elle remonte en tête du tas.
+    """
+
+    def __init__(self):
+        self._tas = []  # (timestamp, numéro, cle)
+        self._actives = {}  # cle -> (numéro, callback)
+        self._numeros = itertools.count()
+        self._reveil = asyncio.Event()
+        self._task = None
+
+    def __len__(self):
+        return len(self._actives)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._boucle())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def planifier(self, cle, instant, callback):
+        """Appelle `callback(cle)` à `instant` (datetime, immédiatement s'il est passé) ;
+        remplace une échéance existante pour cette clé"""
+        numero = next(self._numeros)
+        self._actives[cle] = (numero, callback)
+        heapq.heappush(self._tas, (instant.timestamp(), numero, cle))
+        if self._tas[0][1] == numero:
+            self._reveil.set()  # nouvelle échéance la plus proche
+
+    def annuler(self, cle):
+        self._actives.pop(cle, None)
+
+    def _tete(self):
+        # Écarte les entrées remplacées ou annulées
+        while self._tas:
+            _, numero, cle = self._tas[0]
+            active = self._actives.get(cle)
+            if active is not None and active[0] == numero:
+                return self._tas[0]
+            heapq.heappop(self._tas)
+        return None
+
+    async def _boucle(self):
+        while True:
+            tete = self._tete()
+            attente = ATTENTE_MAX if tete is None else min(tete[0] - time.time(), ATTENTE_MAX)
+            if attente > 0:
+                self._reveil.clear()
+                try:
+                    await asyncio.wait_for(self._reveil.wait(), attente)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, cle = heapq.heappop(self._tas)
+            _, callback = self._actives.pop(cle)
+            try:
+                callback(cle)
+            except Exception as e:
+                print(f"⚠️ Erreur dans l'échéance {cle} : {e}")
@@ -0,0 +1,128 @@
+# utils/edit_scheduler.py
+
+import asyncio
+import os
+from collections import OrderedDict
+
+import discord
+
+from utils.rendu import empreinte
+from utils.sortie import COSMETIQUE, priorite
+
+EDIT_WINDOW = float(os.environ.get("EDIT_WINDOW", "2.0"))  # secondes min entre deux edits d'un même message
+BUCKET_SPACING = float(os.environ.get("EDIT_BUCKET_SPACING", "0.2"))  # secondes min entre deux edits d'un même canal
+ENVOYES_MAX = 2000  # messages dont le dernier état envoyé est retenu
+
+
+class EditScheduler:
+    """Planificateur central des `message.edit`.
+
+    Les edits en attente sont coalescés par message (seul le dernier état est
+    envoyé) et regroupés par canal, qui est le bucket de rate-limit Discord des
+    routes de messages : un seul worker par canal, donc jamais de rafale
+    concurrente sur un même bucket. Un edit identique au dernier état envoyé
+    pour ce message est abandonné sans appel REST (les edits faits hors du
+    planificateur ne sont pas suivis).
+    """
+
+    def __init__(self, window=EDIT_WINDOW, spacing=BUCKET_SPACING):
+        self.window = window
+        self.spacing = spacing
+        self._pending = {}  # channel_id -> {message_id: (message, kwargs, render, window)}
+        self._taches = {}  # channel_id -> worker
+        self._dernier_edit = {}  # message_id -> instant du dernier edit
+        self._bucket_libre = {}  # channel_id -> instant où le bucket accepte un nouvel edit
+        self._envoyes = OrderedDict()  # message_id -> {argument: empreinte du dernier état envoyé}
+        self.ignores = 0  # edits sans effet abandonnés
+
+    def __len__(self):
+        return sum(len(file) for file in self._pending.values())
+
+    def schedule(self, message, render=None, window=None, **kwargs):
+        """Planifie un edit ; fusionne avec l'edit déjà en attente pour ce message.
+
+        `render` est un callable appelé au moment de l'envoi qui retourne les
+        kwargs de l'edit : l'état n'est alors rendu qu'une fois par fenêtre,
+        quel que soit le nombre de modifications entre-temps. `window` remplace
+        la fenêtre par défaut pour ce message.
+        """
+        bucket = message.channel.id
+        file = self._pending.setdefault(bucket, {})
+        if message.id in file:
+            _, anciens_kwargs, ancien_render, ancienne_window = file[message.id]
+            kwargs = {**anciens_kwargs, **kwargs}
+            render = render or ancien_render
+            window = window if window is not None else ancienne_window
+        file[message.id] = (message, kwargs, render, window)
+        if bucket not in self._taches:
+            self._taches[bucket] = asyncio.create_task(self._vider_bucket(bucket))
+
+    def close(self):
+        for tache in self._taches.values():
+            tache.cancel()
+        self._taches.clear()
+        self._pending.clear()
+
+    async def _vider_bucket(self, bucket):
+        # Les edits du planificateur passent après les réponses aux interactions
+        priorite.set(COSMETIQUE)
+        loop = asyncio.get_running_loop()
+        file = self._pending[bucket]
+        try:
+            while file:
+                # Le message prêt le plus tôt passe en premier
+                message_id, pret_a = min(
+                    ((mid, self._dernier_edit.get(mid, float("-inf")) + self._window(entree)) for mid, entree in file.items()),
+                    key=lambda x: x[1],
+                )
+                attente = max(pret_a, self._bucket_libre.get(bucket, 0)) - loop.time()
+                if attente > 0:
+                    await asyncio.sleep(attente)
+                    continue  # de nouveaux edits ont pu arriver entre-temps
+
+                entree = file.pop(message_id)
+                message, kwargs, render = entree[:3]
+                if render is not None:
+                    kwargs = {**kwargs, **render()}
+                empreintes = {cle: empreinte(valeur) for cle, valeur in kwargs.items()}
+                envoye = self._envoyes.get(message_id, {})
+                if all(cle in envoye and envoye[cle] == e for cle, e in empreintes.items()):
+                    self.ignores += 1
+                    continue
+                try:
+                    await message.edit(**kwargs)
+                except discord.HTTPException as e:
+                    if e.status == 429:
+                        # Rate-limit malgré tout : on remet l'edit en file si rien de plus récent n'est arrivé
+                        file.setdefault(message_id, entree)
+                        retry_after = getattr(e, "retry_after", None) or self.window
+                        self._bucket_libre[bucket] = loop.time() + retry_after
+                        continue
+                    print(f"⚠️ Échec de l'edit du message {message_id} : {e}")
+                else:
+                    self._retenir(message_id, empreintes)
+
+                maintenant = loop.time()
+                self._dernier_edit[message_id] = maintenant
+                self._bucket_libre[bucket] = maintenant + self.spacing
+                self._purger(maintenant)
+        finally:
+            self._taches.pop(bucket, None)
+            if not file:
+                self._pending.pop(bucket, None)
+
+    def _retenir(self, message_id, empreintes):
+        envoye = self._envoyes.pop(message_id, {})
+        envoye.update(empreintes)
+        self._envoyes[message_id] = envoye
+        if len(self._envoyes) > ENVOYES_MAX:
+            self._envoyes.popitem(last=False)
+
+    def _window(self, entree):
+        return entree[3] if entree[3] is not None else self.window
+
+    def _purger(self, maintenant):
+        # Les messages dont la fenêtre est écoulée n'ont plus besoin d'être suivis
+        if len(self._dernier_edit) > 1000:
+            limite = maintenant - self.window
+            self._dernier_edit = {mid: t for mid, t in self._dernier_edit.items() if t > limite}
@@ -0,0 +1,54 @@
+# utils/index_hamming.py
+
+# popcount natif depuis Python 3.10
+_bits = getattr(int, "bit_count", None) or (lambda x: bin(x).count("1"))
+
+
+def hamming(a, b):
+    """Nombre de bits différents entre deux empreintes"""
+    return _bits(a ^ b)
+
+
+class IndexHamming:
+    """Voisins d'une empreinte à distance de Hamming bornée, sans parcourir tout l'historique.
+
+    Chaque empreinte est découpée en `rayon + 1` tranches indexées dans autant
+    de dicts : deux empreintes à au plus `rayon` bits d'écart ont forcément une
+    tranche identique (principe des tiroirs). Une recherche ne compare donc que
+    les quelques empreintes qui partagent une tranche avec la requête.
+    """
+
+    __slots__ = ("rayon", "_tranches", "_tables", "_entrees")
+
+    def __init__(self, rayon, bits=64):
+        self.rayon = rayon
+        nb = rayon + 1
+        bornes = [round(bits * i / nb) for i in range(nb + 1)]
+        self._tranches = [(debut, (1 << (fin - debut)) - 1) for debut, fin in zip(bornes, bornes[1:])]  # (décalage, masque)
+        self._tables = [{} for _ in range(nb)]  # valeur de tranche -> [numéros d'entrée]
+        self._entrees = []  # (empreinte, valeur)
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def ajouter(self, empreinte, valeur):
+        numero = len(self._entrees)
+        self._entrees.append((empreinte, valeur))
+        for table, (decalage, masque) in zip(self._tables, self._tranches):
+            table.setdefault((empreinte >> decalage) & masque, []).append(numero)
+
+    def proches(self, empreinte):
+        """[(distance, valeur)] des entrées à au plus `rayon` bits, les plus proches d'abord"""
+        vus = set()
+        resultats = []
+        for table, (decalage, masque) in zip(self._tables, self._tranches):
+            for numero in table.get((empreinte >> decalage) & masque, ()):
+                if numero in vus:
+                    continue
+                vus.add(numero)
+                autre, valeur = self._entrees[numero]
+                distance = hamming(empreinte, autre)
+                if distance <= self.rayon:
+                    resultats.append((distance, valeur))
+        resultats.sort(key=lambda r: r[0])
+        return resultats
@@ -0,0 +1,56 @@
+# utils/intervalles.py
+
+from bisect import bisect_right
+
+
+class IndexIntervalles:
+    """Index d'intervalles [debut, fin] pour retrouver celui qui couvre un instant.
+
+    Les intervalles sont triés par début et on maintient le maximum cumulé des
+    fins : la recherche part du dernier intervalle commencé avant l'instant et
+    s'arrête dès qu'aucun intervalle antérieur ne peut plus le couvrir. Avec des
+    purgatoires qui se chevauchent peu, une requête coûte O(log n).
+    """
+
+    __slots__ = ("_debuts", "_entrees", "_fin_max")
+
+    def __init__(self):
+        self._debuts = []
+        self._entrees = []  # (debut, fin, cle) triés par début
+        self._fin_max = []  # _fin_max[i] = max des fins de _entrees[:i + 1]
+
+    def __len__(self):
+        return len(self._entrees)
+
+    def ajouter(self, debut, fin, cle):
+        i = bisect_right(self._debuts, debut)
+        self._debuts.insert(i, debut)
+        self._entrees.insert(i, (debut, fin, cle))
+        self._fin_max.insert(i, fin)
+        self._recalculer(i)
+
+    def retirer(self, cle):
+        for i, (_, _, c) in enumerate(self._entrees):
+            if c == cle:
+                del self._debuts[i]
+                del self._entrees[i]
+                del self._fin_max[i]
+                self._recalculer(i)
+                return
+
+    def _recalculer(self, i):
+        fin_max = self._fin_max[i - 1] if i > 0 else None
+        for j in range(i, len(self._entrees)):
+            fin = self._entrees[j][1]
+            fin_max = fin if fin_max is None or fin > fin_max else fin_max
+            self._fin_max[j] = fin_max
+
+    def actif(self, instant):
+        """Clé de l'intervalle le plus récemment commencé qui couvre l'instant, ou None"""
+        i = bisect_right(self._debuts, instant) - 1
+        while i >= 0 and self._fin_max[i] >= instant:
+            _, fin, cle = self._entrees[i]
+            if fin >= instant:
+                return cle
+            i -= 1
+        return None
@@ -0,0 +1,31 @@
+# utils/memoire.py
+
+import sys
+
+_CONTENEURS = (dict, list, tuple, set, frozenset)
+
+
+def taille_approx(obj, _vus=None):
+    """Empreinte mémoire approximative (octets) d'un état du bot.
+
+    Parcourt récursivement les conteneurs et les records à slots ; les autres
+    objets (messages, vues, membres discord) ne comptent que pour eux-mêmes et
+    leur `__dict__`, sans suivre leurs références vers l'état du client.
+    """
+    vus = _vus if _vus is not None else set()
+    if id(obj) in vus:
+        return 0
+    vus.add(id(obj))
+
+    taille = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        taille += sum(taille_approx(k, vus) + taille_approx(v, vus) for k, v in obj.items())
+    elif isinstance(obj, _CONTENEURS):
+        taille += sum(taille_approx(v, vus) for v in obj)
+    elif hasattr(type(obj), "__slots__") and not hasattr(obj, "__dict__"):
+        # Records à slots : on suit leurs champs, qui ne contiennent que des ids et des conteneurs
+        taille += sum(taille_approx(getattr(obj, champ), vus) for champ in type(obj).__slots__ if hasattr(obj, champ))
+    elif hasattr(obj, "__dict__") and id(obj.__dict__) not in vus:
+        vus.add(id(obj.__dict__))
+        taille += sys.getsizeof(obj.__dict__)
+    return taille
@@ -0,0 +1,208 @@
+# utils/metriques.py
+
+import contextvars
+import functools
+import logging
+import time
+from bisect import bisect_left
+
+from discord.webhook.async_ import async_context
+
+BORNES_SECONDES = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BORNES_APPELS = (0, 1, 2, 3, 5, 8, 13, 21)
+ROUTE_CALLBACK = "/callback"  # réponse initiale à une interaction (ack)
+
+
+class Histogramme:
+    """Histogramme à bornes fixes : une observation coûte une recherche dichotomique"""
+
+    __slots__ = ("bornes", "comptes", "somme", "total")
+
+    def __init__(self, bornes):
+        self.bornes = bornes
+        self.comptes = [0] * (len(bornes) + 1)  # dernière case : +Inf
+        self.somme = 0.0
+        self.total = 0
+
+    def observer(self, valeur):
+        self.comptes[bisect_left(self.bornes, valeur)] += 1
+        self.somme += valeur
+        self.total += 1
+
+
+class Registre:
+    """Histogrammes et compteurs en mémoire, exposés au format texte Prometheus"""
+
+    def __init__(self):
+        self.histogrammes = {}  # nom -> {labels: Histogramme}
+        self.compteurs = {}  # nom -> {labels: valeur}
+        self.aides = {}  # nom -> description
+
+    def observer(self, nom, valeur, bornes=BORNES_SECONDES, **labels):
+        series = self.histogrammes.setdefault(nom, {})
+        cle = tuple(labels.items())
+        histo = series.get(cle)
+        if histo is None:
+            histo = series[cle] = Histogramme(bornes)
+        histo.observer(valeur)
+
+    def incrementer(self, nom, valeur=1, **labels):
+        series = self.compteurs.setdefault(nom, {})
+        cle = tuple(labels.items())
+        series[cle] = series.get(cle, 0) + valeur
+
+    def exposer(self):
+        lignes = []
+        for nom, series in self.compteurs.items():
+            lignes += [f"# HELP {nom} {self.aides.get(nom, nom)}", f"# TYPE {nom} counter"]
+            lignes += [f"{nom}{_labels(cle)} {valeur}" for cle, valeur in series.items()]
+        for nom, series in self.histogrammes.items():
+            lignes += [f"# HELP {nom} {self.aides.get(nom, nom)}", f"# TYPE {nom} histogram"]
+            for cle, histo in series.items():
+                cumul = 0
+                for borne, compte in zip((*histo.bornes, "+Inf"), histo.comptes):
+                    cumul += compte
+                    lignes.append(f"{nom}_bucket{_labels(cle + (('le', borne),))} {cumul}")
+                lignes.append(f"{nom}_sum{_labels(cle)} {histo.somme}")
+                lignes.append(f"{nom}_count{_labels(cle)} {histo.total}")
+        return lignes
+
+
+def _labels(cle):
+    if not cle:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in cle) + "}"
+
+
+METRIQUES = Registre()
+METRIQUES.aides.update({
+    "bst_handler_secondes": "Durée totale d'un handler de commande ou de bouton",
+    "bst_ack_secondes": "Délai entre l'entrée dans le handler et l'acquittement de l'interaction",
+    "bst_appels_rest_par_interaction": "Appels REST émis pendant un handler",
+    "bst_rate_limit_attente_secondes": "Attentes imposées par un 429 pendant un handler",
+    "bst_handler_erreurs_total": "Handlers terminés par une exception",
+    "bst_appels_rest_total": "Appels REST vers Discord par route",
+    "bst_rest_secondes": "Durée des appels REST (attentes de bucket incluses)",
+    "bst_rate_limits_total": "Réponses 429 reçues de Discord",
+    "bst_rate_limits_globaux_total": "Réponses 429 dues à la limite globale (incluses dans bst_rate_limits_total)",
+    "bst_gateway_evenements_total": "Événements reçus de la gateway par type",
+    "bst_gateway_octets_total": "Octets (décompressés) reçus de la gateway",
+})
+
+
+# ---------------------------
+# Mesure d'une interaction
+# ---------------------------
+class Mesure:
+    __slots__ = ("debut", "ack", "appels_rest", "attente_rate_limit")
+
+    def __init__(self):
+        self.debut = time.perf_counter()
+        self.ack = None
+        self.appels_rest = 0
+        self.attente_rate_limit = 0.0
+
+
+# Mesure du handler en cours ; suit les appels REST faits depuis sa tâche
+_mesure = contextvars.ContextVar("mesure_interaction", default=None)
+
+
+def mesurer(nom):
+    """Décorateur de handler (commande slash, bouton, modal) : durée, ack, appels REST et 429"""
+    def decorateur(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            mesure = Mesure()
+            jeton = _mesure.set(mesure)
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                METRIQUES.incrementer("bst_handler_erreurs_total", handler=nom)
+                raise
+            finally:
+                _mesure.reset(jeton)
+                METRIQUES.observer("bst_handler_secondes", time.perf_counter() - mesure.debut, handler=nom)
+                if mesure.ack is not None:
+                    METRIQUES.observer("bst_ack_secondes", mesure.ack, handler=nom)
+                METRIQUES.observer("bst_appels_rest_par_interaction", mesure.appels_rest, BORNES_APPELS, handler=nom)
+                if mesure.attente_rate_limit:
+                    METRIQUES.observer("bst_rate_limit_attente_secondes", mesure.attente_rate_limit, handler=nom)
+        return wrapper
+    return decorateur
+
+
+# ---------------------------
+# Instrumentation des appels REST
+# ---------------------------
+def _instrumenter(request):
+    @functools.wraps(request)
+    async def wrapper(route, *args, **kwargs):
+        debut = time.perf_counter()
+        try:
+            return await request(route, *args, **kwargs)
+        finally:
+            fin = time.perf_counter()
+            METRIQUES.incrementer("bst_appels_rest_total", methode=route.method, route=route.path)
+            METRIQUES.observer("bst_rest_secondes", fin - debut, methode=route.method, route=route.path)
+            mesure = _mesure.get()
+            if mesure is not None:
+                mesure.appels_rest += 1
+                if mesure.ack is None and route.path.endswith(ROUTE_CALLBACK):
+                    mesure.ack = fin - mesure.debut
+    return wrapper
+
+
+# Attente du dernier 429 de route journalisé par la tâche courante
+_attente_route = contextvars.ContextVar("attente_429_route", default=None)
+
+
+class _CompteurRateLimit(logging.Handler):
+    """Relève les 429 à partir des logs de discord.py, seul endroit où l'attente est visible.
+
+    Formats reconnus : 429 d'une route ou d'un webhook ("... rate limited ...
+    Retrying in"), et limite globale ("Global rate limit has been hit.
+    Retrying in"). discord.py journalise un 429 global deux fois, route puis
+    global, dans la même tâche : la seconde ligne n'est alors comptée qu'une fois.
+    """
+
+    def emit(self, record):
+        msg = str(record.msg)
+        if "Retrying in" not in msg:
+            return
+        attente = record.args[-1]
+        if msg.startswith("Global rate limit"):
+            METRIQUES.incrementer("bst_rate_limits_globaux_total")
+            if _attente_route.get() == attente:
+                # Même réponse que la ligne de route qui précède : déjà comptée et attendue
+                _attente_route.set(None)
+                return
+        else:
+            _attente_route.set(attente)
+        METRIQUES.incrementer("bst_rate_limits_total")
+        # Le log est émis dans la tâche qui attend : la mesure courante est la bonne
+        mesure = _mesure.get()
+        if mesure is not None:
+            mesure.attente_rate_limit += attente
+
+
+def instrumenter_http(bot):
+    """Compte et chronomètre les appels REST du client et des réponses d'interaction"""
+    bot.http.request = _instrumenter(bot.http.request)
+    # Les réponses et followups d'interaction passent par l'adaptateur webhook partagé
+    adaptateur = async_context.get()
+    adaptateur.request = _instrumenter(adaptateur.request)
+    compteur = _CompteurRateLimit(logging.WARNING)
+    logging.getLogger("discord.http").addHandler(compteur)
+    logging.getLogger("discord.webhook.async_").addHandler(compteur)
+
+
+def instrumenter_gateway(bot):
+    """Compte les événements et le volume reçus de la gateway (bot créé avec enable_debug_events)"""
+    async def on_socket_event_type(type_evenement):
+        METRIQUES.incrementer("bst_gateway_evenements_total", type=type_evenement)
+
+    async def on_socket_raw_receive(message):
+        METRIQUES.incrementer("bst_gateway_octets_total", len(message))
+
+    bot.add_listener(on_socket_event_type)
+    bot.add_listener(on_socket_raw_receive)
@@ -0,0 +1,97 @@
+# utils/records.py
+
+from datetime import datetime
+
+from utils.classement import Classement, PagesClassement
+
+
+def _partial_message(bot, channel_id, message_id):
+    return bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+
+
+class CombatRecord:
+    """État d'un combat en cours : uniquement des ids, sérialisable tel quel.
+
+    Les messages discord sont reconstruits à la demande en PartialMessage, ce
+    qui suffit pour `edit` et `channel.send` sans rien garder en cache.
+    """
+
+    __slots__ = (
+        "joueur_id", "status", "cree_le", "maj_le", "joueurs", "type",
+        "aucun_mort", "superiorite", "inferiorite", "bonus", "screens",
+        "channel_id", "message_id", "validation_message_id", "version", "doublons", "guild_id",
+    )
+
+    def __init__(self, joueur_id, channel_id, message_id, cree_le=None, guild_id=None):
+        self.joueur_id = joueur_id
+        self.status = "en_cours"
+        self.cree_le = cree_le or datetime.now().timestamp()
+        self.maj_le = self.cree_le
+        self.joueurs = [joueur_id]
+        self.type = None
+        self.aucun_mort = False
+        self.superiorite = False
+        self.inferiorite = False
+        self.bonus = {"aucun_mort": 0, "attaque": 0, "defense": 0, "superiorite": 0, "inferiorite": 0}
+        self.screens = []
+        self.channel_id = channel_id
+        self.message_id = message_id
+        self.validation_message_id = None
+        self.version = 0  # incrémentée à chaque changement, clé du rendu mémorisé
+        self.doublons = []  # [url, url du screen proche, distance] signalés aux validateurs
+        self.guild_id = guild_id  # serveur dont le leaderboard recevra les points
+
+    @property
+    def points(self):
+        return sum(self.bonus.values())
+
+    @property
+    def cle(self):
+        """Un combat en cours par joueur et par serveur"""
+        return self.guild_id, self.joueur_id
+
+    def message(self, bot):
+        return _partial_message(bot, self.channel_id, self.message_id)
+
+    def validation_message(self, bot):
+        if self.validation_message_id is None:
+            return None
+        return _partial_message(bot, self.channel_id, self.validation_message_id)
+
+    def to_dict(self):
+        return {champ: getattr(self, champ) for champ in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        record = cls.__new__(cls)
+        # Valeurs par défaut pour les lignes écrites par une version antérieure
+        record.validation_message_id = None
+        record.version = 0
+        record.doublons = []
+        record.guild_id = None
+        record.maj_le = data.get("cree_le")
+        if "joueurs_present" in data:
+            record.joueurs = data["joueurs_present"]
+        for champ, valeur in data.items():
+            if champ in cls.__slots__:
+                setattr(record, champ, valeur)
+        return record
+
+
+class LeaderboardRecord:
+    """Leaderboard d'un purgatoire : période, message, classement et ses pages rendues"""
+
+    __slots__ = ("id", "cible", "debut", "fin", "channel_id", "guild_id", "classement", "pages")
+
+    def __init__(self, leaderboard_id, cible, debut, fin, channel_id, guild_id=None, classement=None):
+        self.id = leaderboard_id  # id du message du leaderboard
+        self.cible = cible
+        self.debut = debut
+        self.fin = fin
+        self.channel_id = channel_id
+        self.guild_id = guild_id  # None pour un leaderboard d'avant le multi-serveur pas encore rattaché
+        self.classement = Classement(classement)
+        self.pages = PagesClassement(self.classement)
+
+    def message(self, bot):
+        return _partial_message(bot, self.channel_id, self.id)
@@ -0,0 +1,104 @@
+# utils/redacteur.py
+
+import asyncio
+
+
+class RedacteurFerme(Exception):
+    """Le leaderboard est en cours de clôture : il n'accepte plus de points"""
+
+
+class CommandePoints:
+    """Changement de points à appliquer à un leaderboard.
+
+    `variations` ajoute des points ({joueur_id: delta}), `totaux` impose un
+    total ({joueur_id: points}) calculé au moment de l'application. Une
+    commande portant un `combat_id` déjà appliqué est ignorée.
+    """
+
+    __slots__ = ("motif", "auteur_id", "combat_id", "variations", "totaux", "future")
+
+    def __init__(self, motif, auteur_id, combat_id=None, variations=None, totaux=None):
+        self.motif = motif
+        self.auteur_id = auteur_id
+        self.combat_id = combat_id
+        self.variations = variations or {}
+        self.totaux = totaux or {}
+        self.future = None
+
+
+class RedacteurPoints:
+    """Boîte aux lettres d'un leaderboard, vidée par une seule tâche rédactrice.
+
+    Toutes les modifications de points passent par elle : elles sont appliquées
+    l'une après l'autre, par lots, sans verrou partagé entre leaderboards. Un
+    combat n'est crédité qu'une fois, quel que soit le nombre de clics, et
+    chaque lot ne déclenche qu'un rendu.
+    """
+
+    def __init__(self, appliquer, rendre, combats_credites=()):
+        self._appliquer = appliquer  # commande -> {joueur_id: (ancien, nouveau)}
+        self._rendre = rendre
+        self.combats_credites = set(combats_credites)
+        self._file = asyncio.Queue()
+        self._tache = None
+        self.ferme = False
+
+    def __len__(self):
+        return self._file.qsize()
+
+    def envoyer(self, commande):
+        """Met la commande en file ; la future donne {joueur_id: (ancien, nouveau)},
+        ou None si le combat était déjà crédité. Lève RedacteurFerme après `fermer`."""
+        if self.ferme:
+            raise RedacteurFerme()
+        commande.future = asyncio.get_running_loop().create_future()
+        self._file.put_nowait(commande)
+        if self._tache is None:
+            self._tache = asyncio.create_task(self._rediger())
+        return commande.future
+
+    async def _rediger(self):
+        while True:
+            lot = [await self._file.get()]
+            while not self._file.empty():
+                lot.append(self._file.get_nowait())
+            for commande in lot:
+                # Appliquée même si l'appelant a cessé d'attendre le résultat
+                try:
+                    resultat = self._traiter(commande)
+                except Exception as e:
+                    if not commande.future.done():
+                        commande.future.set_exception(e)
+                else:
+                    if not commande.future.done():
+                        commande.future.set_result(resultat)
+                finally:
+                    self._file.task_done()
+            try:
+                self._rendre()
+            except Exception as e:
+                print(f"⚠️ Rendu après un lot de points impossible : {e}")
+
+    def _traiter(self, commande):
+        if commande.combat_id is not None:
+            if commande.combat_id in self.combats_credites:
+                return None
+            self.combats_credites.add(commande.combat_id)
+        return self._appliquer(commande)
+
+    async def fermer(self):
+        """Applique les commandes encore en file puis arrête la tâche rédactrice.
+
+        Fermé d'abord : plus rien n'entre dans la file pendant qu'elle se vide.
+        """
+        self.ferme = True
+        await self._file.join()
+        if self._tache is not None:
+            self._tache.cancel()
+            self._tache = None
+        # Aucune future ne doit rester sans réponse, même si la tâche s'est arrêtée en route
+        while not self._file.empty():
+            commande = self._file.get_nowait()
+            if not commande.future.done():
+                commande.future.set_exception(RedacteurFerme())
+            self._file.task_done()
@@ -0,0 +1,228 @@
+# utils/rendu.py
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import discord
+
+MAX_SCREENS = 5
+MEMO_MAX = 1000  # rendus gardés par type d'objet
+SEMAINES_AFFICHEES = 8
+JOUEURS_AFFICHES = 10
+
+
+class Memo:
+    """Dernier rendu de chaque objet, réutilisé tant que sa version n'a pas changé.
+
+    Borné en LRU : les objets terminés sortent d'eux-mêmes. Un objet rendu
+    deux fois à la même version donne le même objet, ce qui permet au
+    planificateur d'edits de reconnaître un edit sans effet.
+    """
+
+    def __init__(self, taille_max=MEMO_MAX):
+        self.taille_max = taille_max
+        self._rendus = OrderedDict()  # cle -> (version, rendu)
+        self.hits = 0
+        self.rendus = 0
+
+    def __len__(self):
+        return len(self._rendus)
+
+    def obtenir(self, cle, version, rendre):
+        """Rendu mémorisé pour (cle, version), sinon `rendre()` ; cle None : jamais mémorisé"""
+        entree = self._rendus.get(cle)
+        if entree is not None and entree[0] == version:
+            self._rendus.move_to_end(cle)
+            self.hits += 1
+            return entree[1]
+        self.rendus += 1
+        rendu = rendre()
+        if cle is not None:
+            self._rendus[cle] = (version, rendu)
+            self._rendus.move_to_end(cle)
+            if len(self._rendus) > self.taille_max:
+                self._rendus.popitem(last=False)
+        return rendu
+
+
+COMBATS = Memo()
+LEADERBOARDS = Memo()
+
+
+# ---------------------------
+# Combats
+# ---------------------------
+def lignes_points(bonus):
+    """Détail des points d'un combat, une ligne par bonus non nul"""
+    lignes = []
+    if bonus["attaque"] > 0: lignes.append(f"🗡️ Attaque : +{bonus['attaque']} pts")
+    if bonus["defense"] > 0: lignes.append(f"🛡️ Défense : +{bonus['defense']} pts")
+    if bonus["aucun_mort"] > 0: lignes.append(f"☠️ Aucun mort : +{bonus['aucun_mort']} pts")
+    if bonus["superiorite"] != 0 or bonus["inferiorite"] != 0:
+        val = bonus["superiorite"] + bonus["inferiorite"]
+        lignes.append(f"⚖️ Supériorité / Infériorité : {val:+} pts")
+    return lignes
+
+
+def _joueurs(combat):
+    return ", ".join(f"<@{j}>" for j in combat.joueurs)
+
+
+def embed_combat(combat):
+    """Embed du message d'un combat en cours, mémorisé par version du combat"""
+    def rendre():
+        embed = discord.Embed(
+            title="📊 Ajout d’un combat au ladder purgatoire",
+            description="Validation en attente ⏳",
+            color=0x5865F2
+        )
+        embed.add_field(name="👥 Joueurs présents", value=_joueurs(combat))
+        embed.add_field(name="💠 Points du combat", value="\n".join(lignes_points(combat.bonus)) or "—")
+        embed.add_field(name="💰 Points par joueur", value=f"{combat.points} pts")
+        embed.add_field(name="🖼️ Screens ajoutés", value=f"{len(combat.screens)} / {MAX_SCREENS}")
+        return embed
+    return COMBATS.obtenir(combat.message_id, combat.version, rendre)
+
+
+def embed_validation(combat):
+    """Embed du message de validation pour le ladder (envoyé une seule fois, non mémorisé)"""
+    embed = discord.Embed(
+        title="📊 Validation combat",
+        # Date du combat lui-même : un nouveau rendu (doublons détectés après l'envoi) ne la change pas
+        description=f"📅 Date: {datetime.fromtimestamp(combat.cree_le).strftime('%d/%m/%Y %H:%M')}\n🧾 Détail du combat",
+        color=0xF1C40F
+    )
+    embed.add_field(name="👥 Joueurs", value=_joueurs(combat))
+    embed.add_field(name="💠 Points", value="\n".join(lignes_points(combat.bonus)) or "0 pts")
+    embed.add_field(name="💰 Total par joueur", value=f"{combat.points} pts")
+    if combat.screens:
+        embed.add_field(name="🖼️ Screens", value="\n".join(combat.screens))
+    if combat.doublons:
+        embed.add_field(name="⚠️ Screens déjà vus", value=lignes_doublons(combat.doublons), inline=False)
+    return embed
+
+
+def lignes_doublons(doublons, limite=1024):
+    """Screens proches de ceux d'autres combats, tronqués à la limite d'un champ"""
+    texte = ""
+    for i, (url, autre_url, distance) in enumerate(doublons, start=1):
+        ligne = f"[screen {i}]({url}) ≈ [autre combat]({autre_url}) ({distance} bit(s) d'écart)\n"
+        if len(texte) + len(ligne) > limite:
+            break
+        texte += ligne
+    return texte.rstrip() or "…"
+
+
+# ---------------------------
+# Leaderboards
+# ---------------------------
+def statut_leaderboard(leaderboard, clos=False):
+    if clos:
+        return "🏁 Terminé, classement final"
+    if leaderboard.debut > datetime.now():
+        return "⏳ Pas encore ouvert"
+    return "🟢 En cours"
+
+
+def embed_leaderboard(leaderboard, clos=False):
+    """Embed du message public : première page du classement, mémorisé par version du classement"""
+    statut = statut_leaderboard(leaderboard, clos)
+
+    def rendre():
+        # Seule la première page est affichée ; les suivantes via le bouton
+        classement_text = leaderboard.pages.page(0) or "*(vide pour l’instant)*"
+        nb_pages = len(leaderboard.pages)
+        titre_classement = "🏆 Classement" if nb_pages == 1 else f"🏆 Classement · page 1/{nb_pages}"
+        embed = discord.Embed(
+            title="📊 Leaderboard purgatoire",
+            description=f"🎯 **Cible :** {leaderboard.cible}\n{statut}",
+            color=0x5865F2
+        )
+        embed.add_field(name="Début :", value=leaderboard.debut.strftime("%d/%m/%Y %H:%M"), inline=False)
+        embed.add_field(name="Fin :", value=leaderboard.fin.strftime("%d/%m/%Y %H:%M"), inline=False)
+        embed.add_field(name=titre_classement, value=classement_text, inline=False)
+        embed.set_footer(text="Classement final" if clos else "Mise à jour automatique")
+        return embed
+    return LEADERBOARDS.obtenir(leaderboard.id, (leaderboard.classement.version, statut), rendre)
+
+
+def embed_page_classement(leaderboard, page):
+    """Embed éphémère d'une page du classement ; le texte vient du cache des pages"""
+    embed = discord.Embed(
+        title=f"📊 Purgatoire {leaderboard.cible}",
+        description=leaderboard.pages.page(page) or "*(vide pour l’instant)*",
+        color=0x5865F2
+    )
+    embed.set_footer(text=f"Page {page + 1}/{len(leaderboard.pages)} · {len(leaderboard.classement)} joueur(s)")
+    return embed
+
+
+# ---------------------------
+# Statistiques
+# ---------------------------
+def _ratio(attaques, defenses):
+    return f"{attaques / defenses:.2f}" if defenses else "—"
+
+
+def lignes_semaines(semaines, nb=SEMAINES_AFFICHEES):
+    """Points des dernières semaines, à partir de (débuts, points, participations)"""
+    debuts, points, participations = semaines
+    return [
+        f"Semaine du {datetime.fromtimestamp(debut, timezone.utc).strftime('%d/%m/%Y')} : "
+        f"{int(p)} pts ({int(n)} participation(s))"
+        for debut, p, n in list(zip(debuts, points, participations))[-nb:]
+    ]
+
+
+def embed_stats_serveur(agregat, semaines):
+    """Embed de /stats sans joueur : les plus actifs et les points par semaine, tous purgatoires confondus"""
+    embed = discord.Embed(
+        title="📈 Statistiques du serveur",
+        description=f"{len(agregat['joueur'])} joueur(s), {int(agregat['combats'].sum())} participation(s) à des combats validés",
+        color=0x5865F2
+    )
+    lignes = [
+        f"{rang}. <@{int(joueur_id)}> : {int(combats)} combat(s) · 🗡️ {int(a)} / 🛡️ {int(d)} ({_ratio(a, d)})"
+        f" · ☠️ {sans_mort / combats:.0%} sans mort · {int(points)} pts"
+        for rang, (joueur_id, combats, a, d, sans_mort, points) in enumerate(zip(
+            agregat["joueur"], agregat["combats"], agregat["attaques"], agregat["defenses"],
+            agregat["sans_mort"], agregat["points"],
+        ), start=1)
+        if rang <= JOUEURS_AFFICHES
+    ]
+    embed.add_field(name="🏅 Joueurs les plus actifs", value="\n".join(lignes)[:1024] or "—", inline=False)
+    embed.add_field(name="📅 Points par semaine", value="\n".join(lignes_semaines(semaines)) or "—", inline=False)
+    return embed
+
+
+def embed_stats_joueur(joueur_id, ligne, semaines):
+    """Embed de /stats pour un joueur, à partir de sa ligne d'agrégats"""
+    embed = discord.Embed(
+        title="📈 Statistiques du joueur",
+        description=f"<@{joueur_id}>, tous purgatoires confondus",
+        color=0x5865F2
+    )
+    embed.add_field(name="⚔️ Combats validés", value=str(ligne["combats"]))
+    embed.add_field(
+        name="🗡️ Attaque / 🛡️ Défense",
+        value=f"{ligne['attaques']} / {ligne['defenses']} (ratio {_ratio(ligne['attaques'], ligne['defenses'])})"
+    )
+    embed.add_field(name="☠️ Sans mort", value=f"{ligne['sans_mort']} ({ligne['sans_mort'] / ligne['combats']:.0%})")
+    embed.add_field(
+        name="💰 Points",
+        value=f"{ligne['points']} pts ({ligne['points'] / ligne['semaines']:.1f} par semaine active)"
+    )
+    embed.add_field(name="📅 Points par semaine", value="\n".join(lignes_semaines(semaines)) or "—", inline=False)
+    return embed
+
+
+# ---------------------------
+# Comparaison des edits
+# ---------------------------
+def empreinte(valeur):
+    """Forme comparable d'un argument d'edit (embed, vue ou valeur simple)"""
+    if isinstance(valeur, discord.Embed):
+        return valeur.to_dict()
+    if isinstance(valeur, discord.ui.View):
+        return valeur.to_components()
+    return valeur
@@ -0,0 +1,117 @@
+# utils/screens.py
+
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+
+from utils.index_hamming import IndexHamming
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow optionnel : sans lui, pas de détection des doublons
+    Image = None
+
+SCREENS_CONNEXIONS = int(os.environ.get("SCREENS_CONNEXIONS", "4"))  # téléchargements simultanés
+SCREENS_TRAVAILLEURS = int(os.environ.get("SCREENS_TRAVAILLEURS", "2"))  # threads de calcul des empreintes
+SCREENS_TAILLE_MAX = 10 * 1024 * 1024  # octets ; au-delà le screen n'est pas analysé
+DISTANCE_DOUBLON = int(os.environ.get("SCREENS_DISTANCE_DOUBLON", "6"))  # bits d'écart sur 64 pour un doublon probable
+
+
+def empreinte_image(octets):
+    """dHash 64 bits : image réduite en 9×8 niveaux de gris, un bit par paire de pixels voisins.
+
+    Insensible au redimensionnement et à la recompression ; appelée hors de la
+    boucle d'événements, le décodage de l'image étant coûteux.
+    """
+    with Image.open(io.BytesIO(octets)) as image:
+        image.draft("L", (64, 64))  # JPEG : décodage directement à petite échelle
+        pixels = image.convert("L").resize((9, 8), Image.LANCZOS).tobytes()
+    empreinte = 0
+    for ligne in range(8):
+        for colonne in range(8):
+            i = ligne * 9 + colonne
+            empreinte = (empreinte << 1) | (pixels[i] > pixels[i + 1])
+    return empreinte
+
+
+class IngestionScreens:
+    """Téléchargement, empreinte et indexation des screens soumis.
+
+    Les téléchargements partagent un pool de connexions borné, les empreintes
+    sont calculées dans un pool de threads, et chaque empreinte est comparée à
+    celles de tous les combats passés via un index multi-tranches rechargé
+    depuis la base au démarrage.
+    """
+
+    def __init__(self, storage, connexions=SCREENS_CONNEXIONS, travailleurs=SCREENS_TRAVAILLEURS):
+        self.storage = storage
+        self.connexions = connexions
+        self.index = IndexHamming(DISTANCE_DOUBLON)
+        self._pool = ThreadPoolExecutor(travailleurs, thread_name_prefix="screens")
+        self._session = None
+
+    @property
+    def actif(self):
+        return Image is not None
+
+    def charger(self):
+        for empreinte, combat_id, url in self.storage.charger_screens():
+            self.index.ajouter(empreinte, (combat_id, url))
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.connexions),
+            timeout=aiohttp.ClientTimeout(total=30),
+        )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+        self._pool.shutdown(wait=False)
+
+    async def _telecharger(self, url):
+        async with self._session.get(url) as reponse:
+            reponse.raise_for_status()
+            if (reponse.content_length or 0) > SCREENS_TAILLE_MAX:
+                raise ValueError(f"screen trop lourd ({reponse.content_length} octets)")
+            return await reponse.read()
+
+    async def ingerer(self, combat_id, urls):
+        """Télécharge et indexe les screens d'un combat ; retourne ses doublons probables"""
+        if not self.actif:
+            return []
+        octets = await asyncio.gather(*(self._telecharger(url) for url in urls), return_exceptions=True)
+        sources = []
+        for url, contenu in zip(urls, octets):
+            if isinstance(contenu, Exception):
+                print(f"⚠️ Screen {url} non analysé : {contenu}")
+            else:
+                sources.append((url, contenu))
+        return await self.indexer(combat_id, sources)
+
+    async def indexer(self, combat_id, sources):
+        """Calcule les empreintes de [(url, octets)] et les confronte à l'index.
+
+        Retourne [url, url du screen proche, distance] pour chaque screen qui
+        ressemble à celui d'un autre combat ; tous les screens sont ensuite indexés.
+        """
+        loop = asyncio.get_running_loop()
+        empreintes = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, empreinte_image, contenu) for _, contenu in sources),
+            return_exceptions=True,
+        )
+        doublons = []
+        for (url, _), empreinte in zip(sources, empreintes):
+            if isinstance(empreinte, Exception):
+                print(f"⚠️ Screen {url} illisible : {empreinte}")
+                continue
+            for distance, (autre_combat, autre_url) in self.index.proches(empreinte):
+                if autre_combat != combat_id:
+                    doublons.append([url, autre_url, distance])
+                    break  # le plus proche suffit
+            self.index.ajouter(empreinte, (combat_id, url))
+            self.storage.ajouter_screen(empreinte, combat_id, url)
+        return doublons
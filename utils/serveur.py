@@ -0,0 +1,96 @@
+# utils/serveur.py
+
+import math
+import os
+import time
+
+from aiohttp import web
+
+from utils.metriques import METRIQUES
+
+PORT = int(os.environ.get("PORT", "8080"))
+
+
+class ServeurHTTP:
+    """Serveur HTTP asynchrone sur la boucle du bot (keep-alive, santé, métriques).
+
+    Il tourne dans la même boucle asyncio que discord.py : pas de thread
+    concurrent, et il s'arrête avec le bot au lieu de le maintenir en vie.
+    """
+
+    def __init__(self, bot, port=PORT):
+        self.bot = bot
+        self.port = port
+        self._runner = None
+        app = web.Application()
+        app.router.add_get("/", self.accueil)
+        app.router.add_get("/healthz", self.sante)
+        app.router.add_get("/metrics", self.metriques)
+        self.app = app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, "0.0.0.0", self.port).start()
+        print(f"✅ Serveur HTTP à l'écoute sur le port {self.port}")
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # ---------------------------
+    # Routes
+    # ---------------------------
+    async def accueil(self, request):
+        return web.Response(text="Bot Discord actif ✅")
+
+    def etat_gateway(self):
+        """Connexion, latence et âge du dernier heartbeat acquitté, du pire des shards"""
+        shards = self.bot.shards
+        latences = [latence for _, latence in self.bot.latencies if math.isfinite(latence)]  # nan/inf avant le 1er heartbeat
+        acks = []
+        for shard_id in shards:
+            keep_alive = getattr(self.bot._get_websocket(shard_id=shard_id), "_keep_alive", None)
+            dernier_ack = getattr(keep_alive, "_last_ack", None)
+            if dernier_ack is not None:
+                acks.append(dernier_ack)
+        return {
+            "connecte": self.bot.is_ready() and not self.bot.is_closed() and bool(shards)
+                        and not any(shard.is_closed() for shard in shards.values()),
+            "shards": len(shards),
+            "latence_s": max(latences) if latences else None,
+            "dernier_heartbeat_s": time.perf_counter() - min(acks) if acks else None,
+        }
+
+    async def sante(self, request):
+        etat = self.etat_gateway()
+        return web.json_response(etat, status=200 if etat["connecte"] else 503)
+
+    async def metriques(self, request):
+        etat = self.etat_gateway()
+        combat_cog = self.bot.get_cog("CombatCog")
+        leaderboard_cog = self.bot.get_cog("LeaderboardCog")
+        valeurs = [
+            ("bst_gateway_connecte", "Connexion à la gateway (0/1)", int(etat["connecte"])),
+            ("bst_gateway_shards", "Shards lancés", etat["shards"]),
+            ("bst_gateway_latence_secondes", "Latence du dernier heartbeat, pire shard", etat["latence_s"]),
+            ("bst_gateway_dernier_heartbeat_secondes", "Âge du dernier heartbeat acquitté, pire shard", etat["dernier_heartbeat_s"]),
+            ("bst_serveurs", "Serveurs connus", len(self.bot.guilds)),
+            ("bst_serveurs_configures", "Serveurs avec une configuration enregistrée", len(self.bot.configs)),
+            ("bst_combats_en_memoire", "Combats réhydratés en mémoire", len(combat_cog.combats_en_cours) if combat_cog else 0),
+            ("bst_leaderboards", "Leaderboards chargés", len(leaderboard_cog.leaderboards) if leaderboard_cog else 0),
+            ("bst_edits_en_attente", "Edits de messages en file", len(self.bot.edit_scheduler)),
+            ("bst_echeances", "Échéances planifiées sur la roue", len(self.bot.timer_wheel)),
+            ("bst_screens_indexes", "Empreintes de screens dans l'index des doublons", len(self.bot.screens.index)),
+            ("bst_stats_lignes", "Lignes (joueur, combat) de l'historique en colonnes", len(self.bot.stats)),
+            ("bst_cache_messages", "Messages gardés dans le cache discord.py", len(self.bot.cached_messages)),
+            ("bst_cache_membres", "Membres gardés dans le cache discord.py", sum(len(g.members) for g in self.bot.guilds)),
+        ]
+        lignes = []
+        for nom, aide, valeur in valeurs:
+            if valeur is None:
+                continue
+            lignes += [f"# HELP {nom} {aide}", f"# TYPE {nom} gauge", f"{nom} {valeur}"]
+        lignes += METRIQUES.exposer()
+        return web.Response(text="\n".join(lignes) + "\n", content_type="text/plain", charset="utf-8")
@@ -0,0 +1,120 @@
+# utils/sortie.py
+
+import asyncio
+import contextvars
+import functools
+import heapq
+import itertools
+import os
+import time
+
+from discord.webhook.async_ import async_context
+
+from utils.metriques import METRIQUES, ROUTE_CALLBACK
+
+SORTIE_DEBIT = float(os.environ.get("SORTIE_DEBIT", "45"))  # requêtes/s, sous la limite globale de 50/s de Discord
+SORTIE_RESERVE = float(os.environ.get("SORTIE_RESERVE", "5"))  # jetons jamais consommés par les edits cosmétiques
+
+# Classes de priorité, de la plus urgente à la moins urgente
+ACK, SUIVI, NORMAL, COSMETIQUE = range(4)
+NOMS_CLASSES = ("ack", "suivi", "normal", "cosmetique")
+
+# Classe imposée aux requêtes émises depuis la tâche courante (ex. worker du planificateur d'edits)
+priorite = contextvars.ContextVar("priorite_sortie", default=None)
+
+METRIQUES.aides["bst_file_sortie_attente_secondes"] = "Attente d'un jeton de la file sortante, par classe"
+
+
+class FileSortante:
+    """File des requêtes REST vers Discord, servie par classe de priorité.
+
+    Les réponses d'interaction (ack puis followups) échappent à la limite
+    globale de Discord et partent sans attendre. Les autres requêtes se
+    partagent un seau de jetons réglé sous cette limite : les requêtes
+    ordinaires passent avant les edits cosmétiques du planificateur, qui ne
+    puisent jamais dans les `reserve` derniers jetons. Seul le débit est
+    réparti : une requête qui attend son bucket de route ne bloque personne.
+    """
+
+    def __init__(self, debit=SORTIE_DEBIT, reserve=SORTIE_RESERVE):
+        self.debit = debit
+        self.rafale = max(debit, reserve + 1)
+        self.reserve = reserve
+        self.jetons = self.rafale
+        self._maj = time.monotonic()
+        self._attente = []  # (classe, numéro, future)
+        self._numeros = itertools.count()
+        self._distributeur = None
+
+    def __len__(self):
+        return len(self._attente)
+
+    def _besoin(self, classe):
+        return 1 + (self.reserve if classe == COSMETIQUE else 0)
+
+    def _remplir(self):
+        maintenant = time.monotonic()
+        self.jetons = min(self.rafale, self.jetons + (maintenant - self._maj) * self.debit)
+        self._maj = maintenant
+
+    async def _entrer(self, classe):
+        if classe <= SUIVI:
+            return
+        self._remplir()
+        # Passe directement s'il reste un jeton et que personne d'aussi urgent n'attend
+        if self.jetons >= self._besoin(classe) and (not self._attente or self._attente[0][0] > classe):
+            self.jetons -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._attente, (classe, next(self._numeros), future))
+        if self._distributeur is None:
+            self._distributeur = asyncio.create_task(self._distribuer())
+        await future
+
+    async def _distribuer(self):
+        try:
+            while self._attente:
+                classe, _, future = self._attente[0]
+                if future.done():  # attente annulée
+                    heapq.heappop(self._attente)
+                    continue
+                self._remplir()
+                manque = self._besoin(classe) - self.jetons
+                if manque > 0:
+                    await asyncio.sleep(manque / self.debit)
+                    continue  # une requête plus urgente a pu arriver entre-temps
+                heapq.heappop(self._attente)
+                self.jetons -= 1
+                future.set_result(None)
+        finally:
+            self._distributeur = None
+
+    def close(self):
+        if self._distributeur is not None:
+            self._distributeur.cancel()
+
+    def envelopper(self, request, classer):
+        @functools.wraps(request)
+        async def wrapper(route, *args, **kwargs):
+            classe = classer(route)
+            debut = time.perf_counter()
+            await self._entrer(classe)
+            METRIQUES.observer("bst_file_sortie_attente_secondes", time.perf_counter() - debut, classe=NOMS_CLASSES[classe])
+            return await request(route, *args, **kwargs)
+        return wrapper
+
+    def installer(self, bot):
+        """Fait passer par la file les appels du client et ceux des interactions"""
+        bot.http.request = self.envelopper(bot.http.request, _classe_http)
+        adaptateur = async_context.get()
+        adaptateur.request = self.envelopper(adaptateur.request, _classe_webhook)
+
+
+def _classe_http(route):
+    classe = priorite.get()
+    return NORMAL if classe is None else classe
+
+
+def _classe_webhook(route):
+    # Réponse initiale (message, defer, modal) ou followup / edit de la réponse
+    return ACK if route.path.endswith(ROUTE_CALLBACK) else SUIVI
@@ -0,0 +1,196 @@
+# utils/stats.py
+
+import csv
+import io
+
+from utils.rendu import Memo
+
+try:
+    import numpy as np
+except ImportError:  # NumPy optionnel : sans lui, l'historique est enregistré mais pas agrégé
+    np = None
+
+COMPOSANTES = ("attaque", "defense", "aucun_mort", "superiorite", "inferiorite")  # colonnes de bonus
+TYPES = (None, "Attaque", "Defense")  # type de combat codé par sa position
+SEMAINE = 7 * 86400
+DECALAGE_LUNDI = 3 * 86400  # le 1er janvier 1970 était un jeudi : les semaines commencent le lundi (UTC)
+CAPACITE_INITIALE = 1024
+
+
+def semaine(horodatages):
+    """Numéro de semaine (lundi-dimanche, UTC) de chaque horodatage"""
+    return ((horodatages + DECALAGE_LUNDI) // SEMAINE).astype(np.int64)
+
+
+def debut_semaine(numero):
+    """Timestamp du lundi 0 h (UTC) de la semaine"""
+    return int(numero) * SEMAINE - DECALAGE_LUNDI
+
+
+class StatsCombats:
+    """Historique des combats validés, une ligne par joueur et par combat, rangé en colonnes.
+
+    Chaque colonne est un tableau NumPy agrandi par doublement : un agrégat
+    (par joueur, par semaine) se calcule par masques et `bincount` sur tout
+    l'historique, tous purgatoires confondus. Chaque serveur a une version,
+    incrémentée à chaque combat enregistré comme celle de son leaderboard ;
+    les agrégats sont mémorisés par version et resservis tels quels tant
+    qu'aucun combat n'a été validé.
+    """
+
+    def __init__(self, storage, capacite=CAPACITE_INITIALE):
+        self.storage = storage
+        self._versions = {}  # guild_id -> combats enregistrés depuis le démarrage
+        self._memo = Memo()
+        self._n = 0
+        if np is not None:
+            self._joueur = np.zeros(capacite, np.int64)
+            self._guild = np.zeros(capacite, np.int64)  # 0 : combat sans serveur connu
+            self._leaderboard = np.zeros(capacite, np.int64)
+            self._type = np.zeros(capacite, np.int8)
+            self._horodatage = np.zeros(capacite, np.float64)
+            self._bonus = np.zeros((capacite, len(COMPOSANTES)), np.int16)
+
+    @property
+    def actif(self):
+        return np is not None
+
+    def __len__(self):
+        return self._n
+
+    def charger(self):
+        if self.actif:
+            self._ajouter_lignes(self.storage.charger_stats())
+
+    def version(self, guild_id):
+        return self._versions.get(guild_id or 0, 0)
+
+    # ---------------------------
+    # Écriture
+    # ---------------------------
+    def enregistrer(self, combat, leaderboard_id):
+        """Ajoute un combat validé à l'historique : en base toujours, en colonnes si NumPy est là"""
+        lignes = [
+            (joueur_id, combat.guild_id or 0, leaderboard_id, combat.type, combat.cree_le,
+             *(combat.bonus[composante] for composante in COMPOSANTES))
+            for joueur_id in combat.joueurs
+        ]
+        for ligne in lignes:
+            self.storage.ajouter_stat(combat.message_id, *ligne)
+        if self.actif:
+            self._ajouter_lignes(lignes)
+        guild_id = combat.guild_id or 0
+        self._versions[guild_id] = self._versions.get(guild_id, 0) + 1
+
+    def _ajouter_lignes(self, lignes):
+        """[(joueur, guild, leaderboard, type, horodatage, *bonus)] ajoutées en fin de colonnes"""
+        if not lignes:
+            return
+        debut, fin = self._n, self._n + len(lignes)
+        if fin > len(self._joueur):
+            self._agrandir(fin)
+        joueur, guild, leaderboard, type_, horodatage, *bonus = zip(*lignes)
+        self._joueur[debut:fin] = joueur
+        self._guild[debut:fin] = guild
+        self._leaderboard[debut:fin] = leaderboard
+        self._type[debut:fin] = [TYPES.index(t) if t in TYPES else 0 for t in type_]
+        self._horodatage[debut:fin] = horodatage
+        self._bonus[debut:fin] = np.array(bonus, np.int16).T
+        self._n = fin
+
+    def _agrandir(self, taille):
+        capacite = len(self._joueur)
+        while capacite < taille:
+            capacite *= 2
+        for nom in ("_joueur", "_guild", "_leaderboard", "_type", "_horodatage", "_bonus"):
+            ancienne = getattr(self, nom)
+            nouvelle = np.zeros((capacite, *ancienne.shape[1:]), ancienne.dtype)
+            nouvelle[:self._n] = ancienne[:self._n]
+            setattr(self, nom, nouvelle)
+
+    # ---------------------------
+    # Agrégats (mémorisés par version du serveur)
+    # ---------------------------
+    def _masque(self, guild_id, joueur_id=None):
+        masque = self._guild[:self._n] == (guild_id or 0)
+        if joueur_id is not None:
+            masque &= self._joueur[:self._n] == joueur_id
+        return masque
+
+    def par_joueur(self, guild_id):
+        """Colonnes par joueur du serveur, du plus actif au moins actif : joueur, combats,
+        attaques, defenses, sans_mort, points, semaines (semaines avec au moins un combat)"""
+        return self._memo.obtenir(("joueurs", guild_id), self.version(guild_id), lambda: self._par_joueur(guild_id))
+
+    def _par_joueur(self, guild_id):
+        masque = self._masque(guild_id)
+        joueurs, inverse = np.unique(self._joueur[:self._n][masque], return_inverse=True)
+        type_ = self._type[:self._n][masque]
+        bonus = self._bonus[:self._n][masque]
+        nb = len(joueurs)
+        if nb == 0:
+            vide = np.zeros(0, np.int64)
+            return {nom: vide for nom in ("joueur", "combats", "attaques", "defenses", "sans_mort", "points", "semaines")}
+        # Semaines actives : paires (joueur, semaine) distinctes, codées en un seul entier puis comptées par joueur
+        semaines = semaine(self._horodatage[:self._n][masque])
+        semaines -= semaines.min()
+        etendue = int(semaines.max()) + 1
+        paires = np.unique(inverse.astype(np.int64) * etendue + semaines) // etendue
+        agregat = {
+            "joueur": joueurs,
+            "combats": np.bincount(inverse, minlength=nb),
+            "attaques": np.bincount(inverse, weights=type_ == TYPES.index("Attaque"), minlength=nb).astype(np.int64),
+            "defenses": np.bincount(inverse, weights=type_ == TYPES.index("Defense"), minlength=nb).astype(np.int64),
+            "sans_mort": np.bincount(
+                inverse, weights=bonus[:, COMPOSANTES.index("aucun_mort")] > 0, minlength=nb
+            ).astype(np.int64),
+            "points": np.bincount(inverse, weights=bonus.sum(axis=1), minlength=nb).astype(np.int64),
+            "semaines": np.bincount(paires, minlength=nb),
+        }
+        ordre = np.lexsort((-agregat["points"], -agregat["combats"]))
+        return {nom: colonne[ordre] for nom, colonne in agregat.items()}
+
+    def par_semaine(self, guild_id, joueur_id=None):
+        """(débuts de semaine, points, participations) du serveur ou d'un de ses joueurs, par ordre chronologique"""
+        return self._memo.obtenir(
+            ("semaines", guild_id, joueur_id), self.version(guild_id), lambda: self._par_semaine(guild_id, joueur_id)
+        )
+
+    def _par_semaine(self, guild_id, joueur_id):
+        masque = self._masque(guild_id, joueur_id)
+        semaines, inverse = np.unique(semaine(self._horodatage[:self._n][masque]), return_inverse=True)
+        points = np.bincount(inverse, weights=self._bonus[:self._n][masque].sum(axis=1), minlength=len(semaines))
+        # Une ligne par joueur : un combat à plusieurs compte une participation par joueur
+        participations = np.bincount(inverse, minlength=len(semaines))
+        return [debut_semaine(s) for s in semaines], points.astype(np.int64), participations
+
+    def joueur(self, guild_id, joueur_id):
+        """Agrégats d'un joueur du serveur ({colonne: valeur}), ou None sans combat validé"""
+        agregat = self.par_joueur(guild_id)
+        i = np.flatnonzero(agregat["joueur"] == joueur_id)
+        if not len(i):
+            return None
+        return {nom: int(colonne[i[0]]) for nom, colonne in agregat.items()}
+
+    def exporter_csv(self, guild_id):
+        """Agrégats par joueur du serveur au format CSV (octets UTF-8)"""
+        return self._memo.obtenir(("csv", guild_id), self.version(guild_id), lambda: self._exporter_csv(guild_id))
+
+    def _exporter_csv(self, guild_id):
+        agregat = self.par_joueur(guild_id)
+        sortie = io.StringIO()
+        ecrivain = csv.writer(sortie)
+        ecrivain.writerow([
+            "joueur_id", "combats", "attaques", "defenses", "ratio_attaque_defense",
+            "taux_sans_mort", "points", "semaines_actives", "points_par_semaine",
+        ])
+        for i in range(len(agregat["joueur"])):
+            defenses = agregat["defenses"][i]
+            ecrivain.writerow([
+                int(agregat["joueur"][i]), int(agregat["combats"][i]), int(agregat["attaques"][i]), int(defenses),
+                f"{agregat['attaques'][i] / defenses:.2f}" if defenses else "",
+                f"{agregat['sans_mort'][i] / agregat['combats'][i]:.3f}",
+                int(agregat["points"][i]), int(agregat["semaines"][i]),
+                f"{agregat['points'][i] / agregat['semaines'][i]:.1f}",
+            ])
+        return sortie.getvalue().encode("utf-8")
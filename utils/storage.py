@@ -0,0 +1,597 @@
+# utils/storage.py
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DB_PATH = os.environ.get("BST_DB_PATH", "bst.db")
+FLUSH_DELAY = 0.5  # secondes d'accumulation avant une écriture groupée
+FLUSH_RETRY_MAX = 30.0  # secondes d'attente maximale entre deux essais d'écriture après un échec
+ESSAIS_FERMETURE = 3  # essais d'écriture à la fermeture avant d'abandonner les écritures restantes
+
+# Un combat par joueur et par serveur ; 0 pour un combat d'avant le multi-serveur au serveur inconnu
+TABLE_COMBATS = """
+CREATE TABLE IF NOT EXISTS combats (
+    guild_id INTEGER NOT NULL,
+    joueur_id INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    message_id INTEGER,
+    validation_message_id INTEGER,
+    maj_le REAL,
+    PRIMARY KEY (guild_id, joueur_id)
+);
+"""
+
+SCHEMA = TABLE_COMBATS + """
+CREATE TABLE IF NOT EXISTS leaderboards (
+    id INTEGER PRIMARY KEY,
+    cible TEXT NOT NULL,
+    debut TEXT NOT NULL,
+    fin TEXT NOT NULL,
+    channel_id INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS classements (
+    leaderboard_id INTEGER NOT NULL,
+    joueur_id INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    PRIMARY KEY (leaderboard_id, joueur_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ledger (
+    leaderboard_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    joueur_id INTEGER NOT NULL,
+    delta INTEGER NOT NULL,
+    motif TEXT NOT NULL,
+    auteur_id INTEGER NOT NULL,
+    combat_id INTEGER,
+    horodatage REAL NOT NULL,
+    PRIMARY KEY (leaderboard_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshots (
+    leaderboard_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    horodatage REAL NOT NULL,
+    classement TEXT NOT NULL,
+    PRIMARY KEY (leaderboard_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS screens (
+    combat_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    empreinte INTEGER NOT NULL,
+    ajoute_le REAL NOT NULL,
+    PRIMARY KEY (combat_id, url)
+);
+CREATE TABLE IF NOT EXISTS stats_combats (
+    combat_id INTEGER NOT NULL,
+    joueur_id INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    leaderboard_id INTEGER NOT NULL,
+    type TEXT,
+    horodatage REAL NOT NULL,
+    attaque INTEGER NOT NULL,
+    defense INTEGER NOT NULL,
+    aucun_mort INTEGER NOT NULL,
+    superiorite INTEGER NOT NULL,
+    inferiorite INTEGER NOT NULL,
+    PRIMARY KEY (combat_id, joueur_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS configs (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    cle TEXT PRIMARY KEY,
+    valeur TEXT NOT NULL
+);
+"""
+
+# Colonnes ajoutées à des tables existantes : (table, colonne, définition, remplissage)
+MIGRATIONS = (
+    ("combats", "message_id", "INTEGER", "json_extract(data, '$.message_id')"),
+    ("combats", "validation_message_id", "INTEGER", "json_extract(data, '$.validation_message_id')"),
+    ("combats", "maj_le", "REAL", "COALESCE(json_extract(data, '$.maj_le'), json_extract(data, '$.cree_le'), 0)"),
+    ("leaderboards", "clos", "INTEGER NOT NULL DEFAULT 0", "0"),
+    # Lignes d'avant le multi-serveur : NULL, rattachées à leur serveur dès que son salon est connu
+    ("leaderboards", "guild_id", "INTEGER", "NULL"),
+    ("combats", "guild_id", "INTEGER", "json_extract(data, '$.guild_id')"),
+)
+
+# Table des combats d'avant le multi-serveur (clé joueur_id seule), reconstruite avec la clé (guild_id, joueur_id)
+CLE_COMBATS = f"""
+BEGIN;
+ALTER TABLE combats RENAME TO combats_par_joueur;
+{TABLE_COMBATS}
+INSERT INTO combats (guild_id, joueur_id, data, message_id, validation_message_id, maj_le)
+SELECT COALESCE(guild_id, 0), joueur_id, data, message_id, validation_message_id, maj_le FROM combats_par_joueur;
+DROP TABLE combats_par_joueur;
+COMMIT;
+"""
+
+INDEX = """
+CREATE INDEX IF NOT EXISTS combats_message ON combats (message_id);
+CREATE INDEX IF NOT EXISTS combats_validation_message ON combats (validation_message_id);
+CREATE INDEX IF NOT EXISTS combats_maj_le ON combats (maj_le);
+CREATE INDEX IF NOT EXISTS ledger_joueur ON ledger (leaderboard_id, joueur_id, seq);
+CREATE INDEX IF NOT EXISTS leaderboards_guild ON leaderboards (guild_id, clos);
+"""
+
+# Classements antérieurs au ledger : un snapshot initial (seq 0) leur sert de point de départ
+AMORCE_LEDGER = """
+INSERT INTO snapshots (leaderboard_id, seq, horodatage, classement)
+SELECT leaderboard_id, 0, strftime('%s', 'now'), json_group_object(joueur_id, points)
+FROM classements
+WHERE leaderboard_id NOT IN (SELECT leaderboard_id FROM snapshots)
+  AND leaderboard_id NOT IN (SELECT leaderboard_id FROM ledger)
+GROUP BY leaderboard_id
+"""
+
+
+class Storage:
+    """Persistance SQLite (WAL) avec écriture différée et groupée.
+
+    Les écritures sont mises en file et coalescées par clé : plusieurs mises à
+    jour du même joueur entre deux flushs ne donnent qu'une seule ligne écrite,
+    et tout le lot part dans une seule transaction.
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrer()
+        self.conn.executescript(INDEX)
+        self.conn.execute(AMORCE_LEDGER)
+        # Numéro du dernier événement ; attribué en mémoire pour que les snapshots le connaissent
+        self._seq = self.conn.execute("SELECT COALESCE(MAX(seq), 0) FROM ledger").fetchone()[0]
+        self._pending = {}  # clé -> (sql, params), la dernière écriture gagne
+        self._en_ecriture = {}  # lot du flush en cours, pas encore visible en base
+        self._event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+    def _migrer(self):
+        for table, colonne, definition, remplissage in MIGRATIONS:
+            colonnes = {ligne[1] for ligne in self.conn.execute(f"PRAGMA table_info({table})")}
+            if colonne not in colonnes:
+                self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {colonne} {definition}")
+                self.conn.execute(f"UPDATE {table} SET {colonne} = {remplissage}")
+        cle = {ligne[1] for ligne in self.conn.execute("PRAGMA table_info(combats)") if ligne[5]}
+        if cle == {"joueur_id"}:
+            self.conn.executescript(CLE_COMBATS)
+
+    # ---------------------------
+    # Cycle de vie
+    # ---------------------------
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._boucle_flush())
+
+    async def close(self):
+        if self._task is not None:
+            # Jamais annulée pendant une écriture : son lot ne serait ni écrit ni remis en file
+            async with self._flush_lock:
+                self._task.cancel()
+            self._task = None
+        for essai in range(ESSAIS_FERMETURE):
+            try:
+                await self.flush()
+                break
+            except sqlite3.Error as e:
+                print(f"⚠️ Échec d'écriture en base à la fermeture (essai {essai + 1}/{ESSAIS_FERMETURE}) : {e}")
+                await asyncio.sleep(FLUSH_DELAY * 2 ** essai)
+        if self._pending:
+            print(f"⚠️ {len(self._pending)} écriture(s) perdue(s) à la fermeture")
+        with self._lock:
+            self.conn.close()
+
+    async def _boucle_flush(self):
+        echecs = 0
+        while True:
+            await self._event.wait()
+            # On laisse les mises à jour d'une même rafale s'accumuler
+            await asyncio.sleep(FLUSH_DELAY)
+            self._event.clear()
+            try:
+                await self.flush()
+                echecs = 0
+            except sqlite3.Error as e:
+                # Lot remis en file par flush : nouvel essai, de plus en plus espacé
+                echecs += 1
+                attente = min(FLUSH_DELAY * 2 ** echecs, FLUSH_RETRY_MAX)
+                print(
+                    f"⚠️ Échec d'écriture en base ({len(self._pending)} écriture(s) en attente),"
+                    f" nouvel essai dans {attente:.1f} s : {e}"
+                )
+                await asyncio.sleep(attente)
+                self._event.set()
+
+    async def flush(self):
+        # Un seul flush à la fois pour que les lots soient écrits dans l'ordre
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            ops = list(self._pending.items())
+            self._pending.clear()
+            self._en_ecriture = dict(ops)
+            try:
+                restantes, erreur = await asyncio.to_thread(self._ecrire, ops)
+            finally:
+                self._en_ecriture = {}
+            if restantes:
+                # Remises en tête de file ; une écriture plus récente de la même clé l'emporte
+                pending = dict(restantes)
+                pending.update(self._pending)
+                self._pending = pending
+                raise erreur
+
+    def _ecrire(self, ops):
+        """Écrit le lot [(clé, (sql, params))] ; retourne (écritures à réessayer, erreur).
+
+        Une erreur passagère (base verrouillée, disque plein) annule tout le lot,
+        qui sera réessayé. Une écriture refusée par la base fait reprendre le lot
+        une écriture par transaction : seule la fautive est écartée, et journalisée.
+        """
+        with self._lock:
+            try:
+                self._transaction(ops)
+                return [], None
+            except sqlite3.OperationalError as e:
+                return ops, e
+            except sqlite3.Error as e:
+                print(f"⚠️ Lot de {len(ops)} écriture(s) refusé ({e}) : reprise une par une")
+            for i, op in enumerate(ops):
+                try:
+                    self._transaction((op,))
+                except sqlite3.OperationalError as e:
+                    return ops[i:], e
+                except sqlite3.Error as e:
+                    cle, (sql, params) = op
+                    print(f"⚠️ Écriture {cle} écartée : {e} — {sql} {params}")
+            return [], None
+
+    def _transaction(self, ops):
+        self.conn.execute("BEGIN")
+        try:
+            for _, (sql, params) in ops:
+                self.conn.execute(sql, params)
+            self.conn.execute("COMMIT")
+        except sqlite3.Error:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def _planifier(self, cle, sql, params):
+        self._pending[cle] = (sql, params)
+        self._event.set()
+
+    # ---------------------------
+    # Lectures
+    # ---------------------------
+    def charger_leaderboards(self):
+        """Retourne {leaderboard_id: données} des leaderboards non clos en deux requêtes, classements inclus."""
+        with self._lock:
+            lignes = self.conn.execute(
+                "SELECT id, cible, debut, fin, channel_id, guild_id FROM leaderboards WHERE clos = 0"
+            ).fetchall()
+            points = self.conn.execute(
+                "SELECT leaderboard_id, joueur_id, points FROM classements"
+            ).fetchall()
+
+        leaderboards = {}
+        for lb_id, cible, debut, fin, channel_id, guild_id in lignes:
+            leaderboards[lb_id] = {
+                "cible": cible,
+                "debut": datetime.fromisoformat(debut),
+                "fin": datetime.fromisoformat(fin),
+                "channel_id": channel_id,
+                "guild_id": guild_id,
+                "classement": {},
+            }
+        for lb_id, joueur_id, pts in points:
+            if lb_id in leaderboards:
+                leaderboards[lb_id]["classement"][joueur_id] = pts
+        return leaderboards
+
+    async def charger_combat(self, guild_id=None, joueur_id=None, message_id=None):
+        """Charge le combat d'un joueur sur un serveur, ou celui d'un message (combat ou
+        validation), ou None.
+
+        Par joueur, un combat d'avant le multi-serveur (serveur inconnu) est aussi
+        retourné : l'appelant vérifie son serveur. Une écriture de combat en
+        attente est plus récente que la base : elle répond à la place de la ligne
+        lue, sans vider la file avant chaque lecture.
+        """
+        avant = self._combats_non_ecrits()
+        if joueur_id is not None:
+            cles = list(dict.fromkeys(((guild_id or 0, joueur_id), (0, joueur_id))))
+            lignes = await asyncio.to_thread(
+                self._lire_toutes,
+                "SELECT guild_id, joueur_id, data FROM combats WHERE joueur_id = ? AND guild_id IN (?, 0)",
+                (joueur_id, guild_id or 0),
+            )
+        else:
+            ligne = await asyncio.to_thread(
+                self._lire_une,
+                "SELECT guild_id, joueur_id, data FROM combats WHERE message_id = ? OR validation_message_id = ?",
+                (message_id, message_id),
+            )
+        # Les écritures planifiées pendant la lecture priment sur celles d'avant, qui priment sur la base
+        en_attente = {**avant, **self._combats_non_ecrits()}
+        if joueur_id is not None:
+            en_base = {(ligne[0], ligne[1]): ligne[2] for ligne in lignes}
+            for cle in cles:
+                if cle in en_attente:
+                    params = en_attente[cle]
+                    if params is not None:
+                        return self._combat(joueur_id, params[1])
+                elif cle in en_base:
+                    return self._combat(joueur_id, en_base[cle])
+            return None
+        for (_, joueur), params in en_attente.items():
+            # Paramètres d'un INSERT : (joueur_id, data, message_id, validation_message_id, ...)
+            if params is not None and message_id in params[2:4]:
+                return self._combat(joueur, params[1])
+        if ligne is None or (ligne[0], ligne[1]) in en_attente:
+            # Ligne périmée : le combat de ce joueur a changé de message ou a été supprimé
+            return None
+        return self._combat(ligne[1], ligne[2])
+
+    def _combats_non_ecrits(self):
+        """{(guild_id, joueur_id): paramètres de l'INSERT, ou None si supprimé} des combats
+        pas encore visibles en base"""
+        combats = {}
+        for ops in (self._en_ecriture, self._pending):
+            for cle, (sql, params) in ops.items():
+                if cle[0] == "combat":
+                    combats[cle[1:]] = params if sql.startswith("INSERT") else None
+        return combats
+
+    @staticmethod
+    def _combat(joueur_id, data):
+        data = json.loads(data)
+        data["joueur_id"] = joueur_id
+        return data
+
+    async def combats_en_validation(self, guild_id):
+        """Données des combats du serveur envoyés en validation, du plus ancien au plus récent.
+
+        Les combats d'avant le multi-serveur (serveur inconnu) sont inclus : l'appelant les trie.
+        """
+        await self.flush()
+        lignes = await asyncio.to_thread(
+            self._lire_toutes,
+            "SELECT joueur_id, data FROM combats WHERE validation_message_id IS NOT NULL"
+            " AND guild_id IN (?, 0) ORDER BY maj_le",
+            (guild_id,),
+        )
+        combats = []
+        for joueur_id, data in lignes:
+            data = json.loads(data)
+            data["joueur_id"] = joueur_id
+            combats.append(data)
+        return combats
+
+    def _lire_une(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def lire_meta(self, cle):
+        with self._lock:
+            ligne = self.conn.execute("SELECT valeur FROM meta WHERE cle = ?", (cle,)).fetchone()
+        return ligne[0] if ligne else None
+
+    def evenements_depuis_snapshot(self):
+        """{leaderboard_id: nombre d'événements postérieurs au dernier snapshot}"""
+        with self._lock:
+            return dict(self.conn.execute(
+                "SELECT l.leaderboard_id, COUNT(*) FROM ledger l"
+                " WHERE l.seq > COALESCE((SELECT MAX(s.seq) FROM snapshots s WHERE s.leaderboard_id = l.leaderboard_id), -1)"
+                " GROUP BY l.leaderboard_id"
+            ).fetchall())
+
+    def combats_credites(self):
+        """{leaderboard_id: {combat_id}} des combats déjà crédités sur les leaderboards non clos"""
+        with self._lock:
+            lignes = self.conn.execute(
+                "SELECT DISTINCT l.leaderboard_id, l.combat_id FROM ledger l"
+                " JOIN leaderboards b ON b.id = l.leaderboard_id"
+                " WHERE b.clos = 0 AND l.combat_id IS NOT NULL AND l.motif = 'combat'"
+            ).fetchall()
+        credites = {}
+        for leaderboard_id, combat_id in lignes:
+            credites.setdefault(leaderboard_id, set()).add(combat_id)
+        return credites
+
+    def leaderboard_archive(self, guild_id, instant):
+        """(id, cible) du leaderboard clos le plus récent du serveur dont la période couvre l'instant, ou None"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT id, cible FROM leaderboards WHERE guild_id = ? AND clos = 1 AND debut <= ? AND fin >= ?"
+                " ORDER BY debut DESC LIMIT 1",
+                (guild_id, instant.isoformat(), instant.isoformat()),
+            ).fetchone()
+
+    def canaux_sans_serveur(self):
+        """Salons des leaderboards (clos ou non) encore sans guild_id"""
+        with self._lock:
+            return {ligne[0] for ligne in self.conn.execute("SELECT DISTINCT channel_id FROM leaderboards WHERE guild_id IS NULL")}
+
+    def charger_stats(self):
+        """[(joueur_id, guild_id, leaderboard_id, type, horodatage, *bonus)] de tous les combats validés"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT joueur_id, guild_id, leaderboard_id, type, horodatage,"
+                " attaque, defense, aucun_mort, superiorite, inferiorite FROM stats_combats ORDER BY horodatage"
+            ).fetchall()
+
+    def charger_configs(self):
+        """{guild_id: données} de tous les serveurs configurés"""
+        with self._lock:
+            lignes = self.conn.execute("SELECT guild_id, data FROM configs").fetchall()
+        return {guild_id: json.loads(data) for guild_id, data in lignes}
+
+    async def rejouer(self, leaderboard_id, instant=None):
+        """Classement {joueur_id: points} à l'instant donné (timestamp), rebâti depuis
+        le dernier snapshot antérieur et les événements qui le suivent."""
+        await self.flush()
+        return await asyncio.to_thread(self._rejouer, leaderboard_id, instant if instant is not None else float("inf"))
+
+    def _rejouer(self, leaderboard_id, instant):
+        with self._lock:
+            snapshot = self.conn.execute(
+                "SELECT seq, classement FROM snapshots WHERE leaderboard_id = ? AND horodatage <= ?"
+                " ORDER BY seq DESC LIMIT 1",
+                (leaderboard_id, instant),
+            ).fetchone()
+            seq, data = snapshot or (-1, "{}")
+            queue = self.conn.execute(
+                "SELECT joueur_id, delta FROM ledger WHERE leaderboard_id = ? AND seq > ? AND horodatage <= ?"
+                " ORDER BY seq",
+                (leaderboard_id, seq, instant),
+            ).fetchall()
+        classement = {int(joueur_id): points for joueur_id, points in json.loads(data).items()}
+        for joueur_id, delta in queue:
+            classement[joueur_id] = classement.get(joueur_id, 0) + delta
+        return classement
+
+    async def historique(self, leaderboard_id, joueur_id, limite=10):
+        """Derniers événements d'un joueur : (delta, motif, auteur_id, combat_id, horodatage)"""
+        await self.flush()
+        return await asyncio.to_thread(
+            self._lire_toutes,
+            "SELECT delta, motif, auteur_id, combat_id, horodatage FROM ledger"
+            " WHERE leaderboard_id = ? AND joueur_id = ? ORDER BY seq DESC LIMIT ?",
+            (leaderboard_id, joueur_id, limite),
+        )
+
+    def _lire_toutes(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def charger_screens(self):
+        """[(empreinte, combat_id, url)] de tous les screens indexés"""
+        with self._lock:
+            lignes = self.conn.execute("SELECT empreinte, combat_id, url FROM screens").fetchall()
+        # Empreintes de 64 bits stockées signées (INTEGER SQLite)
+        return [(empreinte & 0xFFFFFFFFFFFFFFFF, combat_id, url) for empreinte, combat_id, url in lignes]
+
+    async def purger_combats(self, avant):
+        """Supprime les combats inactifs depuis `avant` (timestamp).
+
+        Retourne [(channel_id, message_id, validation_message_id)] des combats
+        supprimés, pour que l'appelant grise leurs boutons.
+        """
+        # Un combat actif dont la mise à jour attend encore en file ne doit pas passer pour inactif
+        await self.flush()
+        return await asyncio.to_thread(self._purger_combats, avant)
+
+    def _purger_combats(self, avant):
+        with self._lock:
+            lignes = self.conn.execute(
+                "SELECT json_extract(data, '$.channel_id'), message_id, validation_message_id"
+                " FROM combats WHERE maj_le < ?",
+                (avant,),
+            ).fetchall()
+            self.conn.execute("DELETE FROM combats WHERE maj_le < ?", (avant,))
+        return lignes
+
+    # ---------------------------
+    # Écritures différées
+    # ---------------------------
+    def sauver_leaderboard(self, leaderboard_id, cible, debut, fin, channel_id, guild_id):
+        self._planifier(
+            ("leaderboard", leaderboard_id),
+            "INSERT OR REPLACE INTO leaderboards (id, cible, debut, fin, channel_id, guild_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (leaderboard_id, cible, debut.isoformat(), fin.isoformat(), channel_id, guild_id),
+        )
+
+    def rattacher_leaderboards(self, guild_id, canaux):
+        """Attribue un serveur aux leaderboards d'avant le multi-serveur publiés dans ces salons"""
+        for channel_id in canaux:
+            self._planifier(
+                ("rattachement", channel_id),
+                "UPDATE leaderboards SET guild_id = ? WHERE channel_id = ? AND guild_id IS NULL",
+                (guild_id, channel_id),
+            )
+
+    def sauver_points(self, leaderboard_id, joueur_id, points):
+        self._planifier(
+            ("points", leaderboard_id, joueur_id),
+            "INSERT OR REPLACE INTO classements (leaderboard_id, joueur_id, points) VALUES (?, ?, ?)",
+            (leaderboard_id, joueur_id, points),
+        )
+
+    def ajouter_evenement(self, leaderboard_id, joueur_id, delta, motif, auteur_id, combat_id=None):
+        """Journalise une variation de points ; retourne son numéro de séquence"""
+        self._seq += 1
+        self._planifier(
+            ("ledger", self._seq),  # clé unique : les événements ne sont jamais coalescés
+            "INSERT INTO ledger (leaderboard_id, seq, joueur_id, delta, motif, auteur_id, combat_id, horodatage)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (leaderboard_id, self._seq, joueur_id, delta, motif, auteur_id, combat_id, datetime.now().timestamp()),
+        )
+        return self._seq
+
+    def sauver_snapshot(self, leaderboard_id, seq, classement):
+        self._planifier(
+            ("snapshot", leaderboard_id),
+            "INSERT OR REPLACE INTO snapshots (leaderboard_id, seq, horodatage, classement) VALUES (?, ?, ?, ?)",
+            (leaderboard_id, seq, datetime.now().timestamp(), json.dumps(classement)),
+        )
+
+    def archiver_leaderboard(self, leaderboard_id, classement):
+        """Fige un leaderboard clos : snapshot final, puis ses points quittent la table chaude"""
+        self.sauver_snapshot(leaderboard_id, self._seq, classement)
+        self._planifier(("clos", leaderboard_id), "UPDATE leaderboards SET clos = 1 WHERE id = ?", (leaderboard_id,))
+        self._planifier(
+            ("archive", leaderboard_id), "DELETE FROM classements WHERE leaderboard_id = ?", (leaderboard_id,)
+        )
+
+    def sauver_combat(self, guild_id, joueur_id, data):
+        self._planifier(
+            ("combat", guild_id or 0, joueur_id),
+            "INSERT OR REPLACE INTO combats (joueur_id, data, message_id, validation_message_id, maj_le, guild_id)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (joueur_id, json.dumps(data), data["message_id"], data["validation_message_id"], data["maj_le"], guild_id or 0),
+        )
+
+    def supprimer_combat(self, guild_id, joueur_id):
+        self._planifier(
+            ("combat", guild_id or 0, joueur_id),
+            "DELETE FROM combats WHERE guild_id = ? AND joueur_id = ?",
+            (guild_id or 0, joueur_id),
+        )
+
+    def ajouter_stat(self, combat_id, joueur_id, guild_id, leaderboard_id, type_, horodatage, *bonus):
+        self._planifier(
+            ("stat", combat_id, joueur_id),
+            "INSERT OR REPLACE INTO stats_combats (combat_id, joueur_id, guild_id, leaderboard_id, type, horodatage,"
+            " attaque, defense, aucun_mort, superiorite, inferiorite) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (combat_id, joueur_id, guild_id, leaderboard_id, type_, horodatage, *bonus),
+        )
+
+    def ajouter_screen(self, empreinte, combat_id, url):
+        signee = empreinte - (1 << 64) if empreinte >= 1 << 63 else empreinte
+        self._planifier(
+            ("screen", combat_id, url),
+            "INSERT OR REPLACE INTO screens (combat_id, url, empreinte, ajoute_le) VALUES (?, ?, ?, ?)",
+            (combat_id, url, signee, datetime.now().timestamp()),
+        )
+
+    # ---------------------------
+    # Écritures immédiates
+    # ---------------------------
+    def ecrire_meta(self, cle, valeur):
+        """Écriture immédiate, pour les rares valeurs qui doivent survivre à un crash"""
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (cle, valeur) VALUES (?, ?)", (cle, valeur))
+
+    def sauver_config(self, guild_id, data):
+        """Écriture immédiate : une configuration modifiée ne doit pas se perdre au redémarrage"""
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO configs (guild_id, data) VALUES (?, ?)", (guild_id, json.dumps(data)))
@@ -0,0 +1,68 @@
+# utils/timer_wheel.py
+
+import asyncio
+import math
+
+
+class TimerWheel:
+    """Roue temporelle hachée : planifier ou annuler une échéance coûte O(1).
+
+    Une seule tâche avance d'une case par `resolution` secondes et déclenche
+    les échéances de la case courante. Les délais plus longs qu'un tour de
+    roue sont comptés en tours restants.
+    """
+
+    def __init__(self, resolution=1.0, taille=512):
+        self.resolution = resolution
+        self._slots = [{} for _ in range(taille)]  # case -> {cle: [tours_restants, callback]}
+        self._case_de = {}  # cle -> case
+        self._pos = 0
+        self._task = None
+
+    def __len__(self):
+        return len(self._case_de)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._tourner())
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def planifier(self, cle, delai, callback):
+        """Appelle `callback(cle)` dans `delai` secondes ; remplace une échéance existante pour cette clé"""
+        self.annuler(cle)
+        taille = len(self._slots)
+        ticks = max(1, math.ceil(delai / self.resolution))
+        case = (self._pos + ticks) % taille
+        self._slots[case][cle] = [(ticks - 1) // taille, callback]
+        self._case_de[cle] = case
+
+    def annuler(self, cle):
+        case = self._case_de.pop(cle, None)
+        if case is not None:
+            del self._slots[case][cle]
+
+    async def _tourner(self):
+        loop = asyncio.get_running_loop()
+        prochain = loop.time()
+        while True:
+            prochain += self.resolution
+            await asyncio.sleep(max(0, prochain - loop.time()))
+            self._pos = (self._pos + 1) % len(self._slots)
+            case = self._slots[self._pos]
+            echues = []
+            for cle, entree in case.items():
+                if entree[0] > 0:
+                    entree[0] -= 1
+                else:
+                    echues.append((cle, entree[1]))
+            for cle, callback in echues:
+                del case[cle]
+                del self._case_de[cle]
+                try:
+                    callback(cle)
+                except Exception as e:
+                    print(f"⚠️ Erreur dans l'échéance {cle} : {e}")